@@ -0,0 +1,291 @@
+import argparse
+import gzip
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import fastf1 as ff1
+import pandas as pd
+from session_data import (DataRequestError, load_data_session, get_results_table, get_fuel_correction, get_total_laps,
+    get_best_laps)
+from telemetry import adaptive_distance_grid, inter_tel_data
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Local analytics API: same frames as the app, served as Arrow IPC / Parquet / JSON
+# GET /sessions/<year>/<event>/<session>/<frame>[?format=arrow|parquet|json]
+#   frame: results, laps, best_laps, telemetry (?driver=VER&lap=12[&samples=600])
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "json": "application/json",
+}
+SESSIONS_CACHE_SIZE = 8
+PAYLOADS_CACHE_SIZE = 256
+COMPRESS_MIN_SIZE = 1024
+MAX_AGE = 3600  # s, completed sessions do not change
+KEEP_ALIVE_TIMEOUT = 5  # s, idle keep-alive connections are closed to free their pool worker
+
+# Bounded LRU cache with one in-flight computation per key
+class LoadingCache:
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent requests for the same key wait for the first load instead of repeating it
+        with key_lock:
+            with self._lock:
+                if key in self._items:
+                    return self._items[key]
+            try:
+                value = loader()
+                with self._lock:
+                    self._items[key] = value
+                    while len(self._items) > self.maxsize:
+                        self._items.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return value
+
+    def peek(self, key):
+        with self._lock:
+            return self._items.get(key)
+
+sessions_cache = LoadingCache(SESSIONS_CACHE_SIZE)
+payloads_cache = LoadingCache(PAYLOADS_CACHE_SIZE)
+
+def load_session(year, event, session, telemetry=False):
+    # FastF1 rejects unknown events / sessions with ValueError
+    try:
+        return load_data_session(year, event, session, laps=True, telemetry=telemetry)
+    except ValueError as error:
+        raise DataRequestError(str(error)) from error
+
+def get_session(year, event, session, telemetry=False):
+    # A session loaded with telemetry also serves the laps-only frames
+    key = (year, event, session)
+    if telemetry:
+        return sessions_cache.get(key+(True,), lambda: load_session(year, event, session, telemetry=True))
+    ff1_session = sessions_cache.peek(key+(True,))
+    if ff1_session is not None:
+        return ff1_session
+    return sessions_cache.get(key+(False,), lambda: load_session(year, event, session))
+
+def int_param(params, name):
+    try:
+        return int(params[name])
+    except ValueError:
+        raise DataRequestError(f"{name} must be an integer, got {params[name]}")
+
+# Frame builders (same functions as the app)
+def frame_results(year, event, session, params):
+    return get_results_table(get_session(year, event, session), session)
+
+def frame_laps(year, event, session, params):
+    ff1_session = get_session(year, event, session)
+    n_laps = int(max(ff1_session.laps.loc[:,"LapNumber"]))
+    _, df_fuel_correction = get_fuel_correction(n_laps)
+    return get_total_laps(ff1_session.laps, df_fuel_correction)
+
+def frame_best_laps(year, event, session, params):
+    return get_best_laps(payloads_cache.get(
+        ("frame", year, event, session, "laps", ()), lambda: frame_laps(year, event, session, params)
+    ))
+
+def frame_telemetry(year, event, session, params):
+    if ("driver" not in params) or ("lap" not in params):
+        raise DataRequestError("telemetry needs driver and lap parameters")
+    lap = int_param(params, "lap")
+    samples = int_param(params, "samples") if "samples" in params else None
+    ff1_session = get_session(year, event, session, telemetry=True)
+    select_lap = ff1_session.laps.pick_driver(params["driver"]).pick_laps(lap)
+    if len(select_lap) == 0:
+        raise DataRequestError(f"no lap {lap} for driver {params['driver']}")
+    df_telemetry_lap = select_lap.get_telemetry()
+    if samples is not None:
+        s_distance = adaptive_distance_grid([df_telemetry_lap], n_samples=samples)
+    else:
+        s_distance = range(0,round(df_telemetry_lap.at[df_telemetry_lap.index[-1],"Distance"]),4)
+    return inter_tel_data(s_distance, df_telemetry_lap, params["driver"], 1)
+
+FRAMES = {
+    "results": frame_results,
+    "laps": frame_laps,
+    "best_laps": frame_best_laps,
+    "telemetry": frame_telemetry,
+}
+
+# Object columns mixing values and NaT (e.g. convert_time_float output) as typed, nullable columns
+def arrow_ready(df):
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        not_null = df.loc[:,col].notna()
+        numeric = pd.to_numeric(df.loc[:,col].where(not_null), errors="coerce")
+        if numeric.notna().sum() == not_null.sum():
+            df[col] = numeric.astype(float)
+        else:
+            df[col] = df.loc[:,col].where(not_null, None)
+    return df
+
+def serialize(df, fmt):
+    if fmt == "json":
+        return df.to_json(orient="records", date_format="iso").encode("utf-8")
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow / Parquet output")
+    table = pa.Table.from_pandas(arrow_ready(df), preserve_index=False)
+    buffer = io.BytesIO()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(buffer, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+# Serialized frame and its ETag, cached per (session, frame, parameters, format)
+def get_payload(year, event, session, frame, params, fmt):
+    key_params = tuple(sorted(params.items()))
+    def load_payload():
+        df = payloads_cache.get(
+            ("frame", year, event, session, frame, key_params),
+            lambda: FRAMES[frame](year, event, session, params)
+        )
+        body = serialize(df, fmt)
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return payloads_cache.get(("payload", year, event, session, frame, key_params, fmt), load_payload)
+
+class AnalyticsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEP_ALIVE_TIMEOUT
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if parts == ["health"]:
+            return self.send_body(HTTPStatus.OK, b'{"status": "ok"}', "application/json")
+        if (len(parts) != 5) or (parts[0] != "sessions") or (parts[4] not in FRAMES) or (not parts[1].isdigit()):
+            return self.send_error(HTTPStatus.NOT_FOUND, "Use /sessions/<year>/<event>/<session>/<frame>")
+        fmt = params.pop("format", None) or self.accepted_format()
+        if fmt not in FORMATS:
+            return self.send_error(HTTPStatus.NOT_ACCEPTABLE, f"Formats: {', '.join(FORMATS)}")
+        if (fmt != "json") and (pa is None):
+            return self.send_error(HTTPStatus.NOT_ACCEPTABLE, "pyarrow is required for Arrow / Parquet output")
+        try:
+            body, etag = get_payload(int(parts[1]), parts[2], parts[3], parts[4], params, fmt)
+        except DataRequestError as error:
+            return self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+        # Anything else is a bug in the frame builders, not a bad request
+        except Exception as error:
+            self.log_error("%s failed: %r", self.path, error)
+            return self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Error building the frame")
+
+        # One ETag per content coding, the gzip and identity bodies are different representations
+        encoding = self.content_encoding(body, FORMATS[fmt])
+        if encoding is not None:
+            etag = f'{etag[:-1]}-{encoding}"'
+
+        # Conditional GET
+        if_none_match = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+        if (etag in if_none_match) or ("*" in if_none_match):
+            return self.send_body(HTTPStatus.NOT_MODIFIED, b"", FORMATS[fmt], etag)
+        self.send_body(HTTPStatus.OK, body, FORMATS[fmt], etag, encoding)
+
+    def accepted_format(self):
+        accept = self.headers.get("Accept", "")
+        for fmt, content_type in FORMATS.items():
+            if content_type in accept:
+                return fmt
+        return "arrow" if pa is not None else "json"
+
+    # Parquet is already compressed, everything else is gzipped if the client accepts it
+    def content_encoding(self, body, content_type):
+        if (len(body) >= COMPRESS_MIN_SIZE) and (content_type != FORMATS["parquet"]) and \
+                ("gzip" in self.headers.get("Accept-Encoding", "")):
+            return "gzip"
+        return None
+
+    def send_body(self, status, body, content_type, etag=None, encoding=None):
+        if encoding == "gzip":
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", f"max-age={MAX_AGE}")
+        self.send_header("Vary", "Accept, Accept-Encoding")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if (encoding is not None) and (status != HTTPStatus.NOT_MODIFIED):
+            self.send_header("Content-Encoding", encoding)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+# HTTP server handling requests on a bounded worker pool, 503 when the queue is full
+class PooledHTTPServer(HTTPServer):
+
+    def __init__(self, address, handler, workers=4, queue_size=32):
+        super().__init__(address, handler)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nRetry-After: 1\r\nConnection: close\r\n\r\n")
+            self.shutdown_request(request)
+            return
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pit Wall Analytics local data API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--cache-dir", default=None, help="FastF1 cache directory (shared with the app)")
+    args = parser.parse_args()
+    if args.cache_dir is not None:
+        ff1.Cache.enable_cache(args.cache_dir)
+    server = PooledHTTPServer((args.host, args.port), AnalyticsHandler, workers=args.workers, queue_size=args.queue_size)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
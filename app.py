@@ -1,30 +1,41 @@
 import streamlit as st
 import fastf1 as ff1
 import datetime as dt
+import time
 import pandas as pd
 import numpy as np
 import altair as alt
 from annotated_text import annotated_text
-from scipy.signal import butter, filtfilt
+from session_data import (convert_time_string, convert_time_float, load_data_session, get_results_table,
+    get_fuel_correction, get_total_laps, get_best_laps)
+from telemetry import (ADAPTIVE_SAMPLES, adaptive_distance_grid, get_acceleration, inter_tel_data,
+    fastest_laps_car_data, ghost_comparison)
+from timeline import race_timeline
+from strategy import SPRINT_STOPS, estimate_pit_loss, fit_compound_models, simulate_strategies
+from livetiming import LiveTimingReplay
 
-ff1.ergast.interface.BASE_URL = "https://api.jolpi.ca/ergast/f1"
+REPLAY_REFRESH = 2  # s between replay reruns
 
 # Function definition
-def convert_time_string(timedelta_raw):
-    if pd.notna(timedelta_raw):
-        hours, rem = divmod(timedelta_raw.seconds, 3600)
-        minutes, seconds = divmod(rem, 60)
-        milliseconds = timedelta_raw.microseconds // 1000 
-        return str(f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}")
+@st.cache_data
+def load_race_timeline(year, event, session, _laps):
+    return race_timeline(_laps)
+
+@st.cache_data
+def load_strategy_ranking(year, event, session, _laps, _df_total_laps, n_laps, time_fuel_lap):
+    pit_loss = estimate_pit_loss(_laps)
+    df_models = fit_compound_models(_df_total_laps)
+    # Sprint: no mandatory stop, any compound sequence
+    if session == "Sprint":
+        df_strategies = simulate_strategies(df_models, n_laps, time_fuel_lap, pit_loss, stops=SPRINT_STOPS, two_compounds=False)
     else:
-        return pd.NaT
-    
-#@st.cache_data
-def load_data_session(year, event, session, laps=False, telemetry=False, weather=False):
-    ff1_event = ff1.get_event(year=year, gp=event)
-    ff1_session = ff1_event.get_session(session)
-    ff1_session.load(laps=laps, telemetry=telemetry, weather=weather)
-    return ff1_session
+        df_strategies = simulate_strategies(df_models, n_laps, time_fuel_lap, pit_loss)
+    return df_strategies, df_models, pit_loss
+
+@st.cache_data
+def load_fastest_laps(year, event, session):
+    ff1_session = load_data_session(year, event, session, laps=True, telemetry=True)
+    return fastest_laps_car_data(ff1_session.laps)
 
 def convert_time_string_general(timedelta_raw):
     if pd.notna(timedelta_raw):
@@ -34,13 +45,6 @@ def convert_time_string_general(timedelta_raw):
     else:
         return pd.NaT
     
-def convert_time_float(timedelta_raw):
-    if pd.notna(timedelta_raw):
-        milliseconds = timedelta_raw.microseconds // 1000 
-        return float(timedelta_raw.seconds)+milliseconds*0.001
-    else:
-        return pd.NaT
-
 # Page layout
 st.set_page_config(
     page_title="Pit Wall Analytics",
@@ -140,26 +144,30 @@ colH4.metric(
 ## Tab RESULTS
 # Load data with Laps info
 select_session = load_data_session(st.session_state.sel_year, st.session_state.sel_GP, st.session_state.sel_GP_session, laps=True)
-select_session_results = select_session.results.copy()
 
 # Data formatting
-if (st.session_state.sel_GP_session == "Qualifying"):
-    select_session_results = select_session_results.assign(
-        Q1_str=lambda df: df.loc[:,"Q1"].map(convert_time_string),
-        Q2_str=lambda df: df.loc[:,"Q2"].map(convert_time_string),
-        Q3_str=lambda df: df.loc[:,"Q3"].map(convert_time_string)
-    )
-    results_Q_col = ["Position", "DriverNumber", "BroadcastName", "TeamName", "Q1_str", "Q2_str", "Q3_str"]
-    results_Q_view = {"BroadcastName":"Driver", "DriverNumber":"Number", "TeamName":"Team", "Q1_str":"Q1", "Q2_str":"Q2", "Q3_str":"Q3"}
-    st.session_state.results = select_session_results.loc[:,results_Q_col].rename(columns=results_Q_view)
-elif ((st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint")):
-    select_session_results.loc[:,"Time_str"] = select_session_results.apply(
-        lambda s: convert_time_string(s.at["Time"]) if int(s.at["Position"])!=1 else pd.NaT,
-        axis=1
-    )
-    results_R_col = ["Position", "Status", "DriverNumber", "BroadcastName", "TeamName", "Time_str", "Points"]
-    results_R_view = {"DriverNumber":"Number", "BroadcastName":"Driver", "TeamName":"Team", "Time_str":"Leader"}
-    st.session_state.results = select_session_results.loc[:,results_R_col].rename(columns=results_R_view)
+st.session_state.results = get_results_table(select_session, st.session_state.sel_GP_session)
+
+# Live-timing replay from a recorded FastF1 livetiming file (independent from the selected session)
+replay_expander = tab_Results.expander("Live-timing replay")
+replay_file = replay_expander.text_input("Recorded live-timing file", placeholder="path/to/saved_data.txt", key="replay_file")
+replay_speed = replay_expander.number_input("Replay speed", min_value=1.0, max_value=100.0, value=10.0, step=1.0, key="replay_speed")
+replay_follow = replay_expander.checkbox("Follow file (live session)", key="replay_follow")
+replay_active = replay_expander.toggle("Replay", disabled=not(replay_file), key="replay_active")
+if replay_active:
+    if ("replay" not in st.session_state) or (st.session_state.replay.path != replay_file):
+        st.session_state.replay = LiveTimingReplay(replay_file, speed=replay_speed)
+    st.session_state.replay.set_speed(replay_speed)
+    try:
+        st.session_state.replay.poll()
+    except OSError as error:
+        replay_expander.error(f"Cannot read the recorded file: {error}")
+        del st.session_state.replay
+        replay_active = False
+if replay_active:
+    replay_expander.metric("Laps completed (leader)", f"{len(st.session_state.replay.df_laps_position.loc[:,'LapNumber'].unique())}")
+elif "replay" in st.session_state:
+    del st.session_state.replay
 
 # Input from user (driver)
 driver_selection = col6.multiselect(
@@ -170,9 +178,9 @@ driver_selection = col6.multiselect(
     key="driver_selection")
 colR1, colR2 = tab_Results.columns(2)
 
-# Selected session results display
+# Selected session (or replay) results display
 colR1.dataframe(
-        st.session_state.results,
+        st.session_state.replay.results if replay_active else st.session_state.results,
         hide_index=True,
         use_container_width=True,
         key="results_display"
@@ -196,12 +204,7 @@ colR7.metric("Race format",
 ## Data wrangling
 # Fuel correction estimation
 n_laps = int(max(select_session.laps.loc[:,"LapNumber"]))
-time_fuel_lap = (110-1)/n_laps*0.03
-df_fuel_correction = pd.DataFrame({
-    "LapNumber": [float(num) for num in range(1,1+n_laps)]
-    }).assign(
-        FuelCorr=lambda s: round((n_laps-s.loc[:,"LapNumber"])*time_fuel_lap,3)
-    )
+time_fuel_lap, df_fuel_correction = get_fuel_correction(n_laps)
 
 # Driver / team color schema
 df_color_schema = select_session.results.loc[:,["Abbreviation", "TeamName", "TeamColor"]]
@@ -210,44 +213,49 @@ df_color_schema.loc[:,"TeamColor"] = df_color_schema.loc[:,"TeamColor"].map(lamb
 # Position vs lap dataframe for charts (only "Race")
 df_laps_position = select_session.laps.loc[:,["LapNumber", "Driver", "Position", "Team"]]
 
+# Gap to leader / interval vs lap and undercut-overcut windows (only "Race")
+if ((st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint")):
+    df_laps_gap, df_pit_windows = load_race_timeline(st.session_state.sel_year, st.session_state.sel_GP, st.session_state.sel_GP_session, select_session.laps)
+
 # Lap time distribution vs team dataframe for charts
-df_total_laps = select_session.laps.pick_wo_box().pick_quicklaps().loc[:,["Driver", "Team", "LapNumber", "Stint", "Compound", "LapTime"]]
-try:
-    df_total_laps = df_total_laps.loc[df_total_laps.loc["LapNumber"]!=1,:]
-except:
-    pass
-df_total_laps.loc[:,"LapTime_Q"] = df_total_laps.loc[:,"LapTime"].map(convert_time_float).drop(columns=["LapTime"])
-df_total_laps = df_total_laps.merge(df_fuel_correction, on="LapNumber", how="left")
-df_total_laps.loc[:,"LapTime_Q_corr"] = df_total_laps.apply(lambda s: s.at["LapTime_Q"]-s.at["FuelCorr"], axis=1).drop(columns=["FuelCorr"])
-df_total_laps  = df_total_laps.merge(
-    df_total_laps.loc[:,["Team", "LapTime_Q"]].groupby("Team").median().reset_index(), on="Team", suffixes=["", "_median"]
+df_total_laps = get_total_laps(select_session.laps, df_fuel_correction)
+
+# Chart frames: replay frames (appended lap by lap) or the selected session ones
+if replay_active:
+    chart_n_laps = int(st.session_state.replay.total_laps or max(st.session_state.replay.df_laps_position.loc[:,"LapNumber"], default=1))
+    df_chart_color_schema = st.session_state.replay.color_schema
+    df_chart_laps_position = st.session_state.replay.df_laps_position
+    df_chart_total_laps = st.session_state.replay.df_total_laps.assign(
+        LapTime_Q_median=lambda df: df.loc[:,"LapTime_Q"].astype(float).groupby(df.loc[:,"Team"]).transform("median")
     )
+else:
+    chart_n_laps = n_laps
+    df_chart_color_schema = df_color_schema
+    df_chart_laps_position = df_laps_position
+    df_chart_total_laps = df_total_laps
 
 # Lap time gap to P1 vs driver dataframe for charts (only "Qualifying")
-df_best_laps = df_total_laps.loc[:,["Driver", "Team", "LapTime_Q"]].groupby("Driver").min().sort_values("LapTime_Q").reset_index()
-df_best_laps = df_best_laps.assign(
-    Gap=lambda df: df.loc[:,"LapTime_Q"] - df.loc[df.index[0],"LapTime_Q"]
-    )
+df_best_laps = get_best_laps(df_total_laps)
 
 ## Charts
 tab_Results.divider()
 colR8, colR9 = tab_Results.columns(2)
 
-# Chart #1: Position vs lap (only "Race")
-if ((st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint")):
-    alt_R1_base = alt.Chart(df_laps_position, title="Race position").mark_line().encode(
-        alt.X("LapNumber:Q").scale(domain=[1,n_laps]).title("Lap").title("Lap number"),
+# Chart #1: Position vs lap (only "Race" or replay)
+if replay_active | (st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint"):
+    alt_R1_base = alt.Chart(df_chart_laps_position, title="Race position").mark_line().encode(
+        alt.X("LapNumber:Q").scale(domain=[1,chart_n_laps]).title("Lap").title("Lap number"),
         alt.Y("Position:Q").scale(domain=[20,1]).axis(tickCount=20, orient="left"),
-        color=alt.Color("Driver:N").scale(domain=df_color_schema.loc[:,"Abbreviation"], range=df_color_schema.loc[:,"TeamColor"]),
+        color=alt.Color("Driver:N").scale(domain=df_chart_color_schema.loc[:,"Abbreviation"], range=df_chart_color_schema.loc[:,"TeamColor"]),
         tooltip= ["Driver", alt.Tooltip("LapNumber", title="Lap number"), "Position"]
     ).properties(
         width=600,
         height=600
     )
     alt_R1_top = alt_R1_base.mark_point().encode(
-        alt.X("LapNumber:Q").scale(domain=[1,n_laps]).title("Lap").title("Lap number"),
+        alt.X("LapNumber:Q").scale(domain=[1,chart_n_laps]).title("Lap").title("Lap number"),
         alt.Y("Position:Q").scale(domain=[20,1]).axis(tickCount=20, orient="right", title=""),
-        color=alt.Color("Driver:N").scale(domain=df_color_schema.loc[:,"Abbreviation"], range=df_color_schema.loc[:,"TeamColor"]),
+        color=alt.Color("Driver:N").scale(domain=df_chart_color_schema.loc[:,"Abbreviation"], range=df_chart_color_schema.loc[:,"TeamColor"]),
     )
     alt_R1 = alt.layer(alt_R1_base, alt_R1_top)
     colR8.altair_chart(alt_R1)
@@ -265,16 +273,42 @@ else:
     )
     colR8.altair_chart(alt_R2)
 
-# Chart #3: Lap time distribution vs team
-alt_R3 = alt.Chart(df_total_laps, title="Lap time distribution (s)").mark_boxplot().encode(
-    x=alt.X("Team:N",sort=df_total_laps.sort_values("LapTime_Q_median", ascending=True).loc[:,"Team"].unique()),
-    y=alt.Y("LapTime_Q:Q").scale(zero=False).title("Lap time (s)").title("Lap time (s)"),
-    color=alt.Color("Team:N").scale(domain=df_color_schema.loc[:,"TeamName"].unique(), range=df_color_schema.loc[:,"TeamColor"].unique()),
-).properties(
-    width=600,
-    height=600
-)
-colR9.altair_chart(alt_R3)
+# Chart #3: Lap time distribution vs team (replay: from the first completed lap)
+if len(df_chart_total_laps)>0:
+    alt_R3 = alt.Chart(df_chart_total_laps, title="Lap time distribution (s)").mark_boxplot().encode(
+        x=alt.X("Team:N",sort=df_chart_total_laps.sort_values("LapTime_Q_median", ascending=True).loc[:,"Team"].unique()),
+        y=alt.Y("LapTime_Q:Q").scale(zero=False).title("Lap time (s)").title("Lap time (s)"),
+        color=alt.Color("Team:N").scale(domain=df_chart_color_schema.loc[:,"TeamName"].unique(), range=df_chart_color_schema.loc[:,"TeamColor"].unique()),
+    ).properties(
+        width=600,
+        height=600
+    )
+    colR9.altair_chart(alt_R3)
+
+# Chart #4: Gap to leader vs lap (only "Race", hidden while replaying)
+if (not replay_active) & ((st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint")):
+    colR10, colR11 = tab_Results.columns(2)
+    alt_R4 = alt.Chart(df_laps_gap, title="Gap to leader (s)").mark_line().encode(
+        alt.X("LapNumber:Q").scale(domain=[1,n_laps]).title("Lap number"),
+        alt.Y("Gap:Q").scale(reverse=True).title("Gap to leader (s)"),
+        color=alt.Color("Driver:N").scale(domain=df_color_schema.loc[:,"Abbreviation"], range=df_color_schema.loc[:,"TeamColor"]),
+        tooltip= ["Driver", alt.Tooltip("LapNumber", title="Lap number"), alt.Tooltip("Gap", title="Gap (s)"), alt.Tooltip("Interval", title="Interval (s)")]
+    ).properties(
+        width=600,
+        height=600
+    ).interactive()
+    colR10.altair_chart(alt_R4)
+
+# Undercut / overcut windows display
+    pit_windows_view = {
+        "LapFrom":"From lap", "LapTo":"To lap", "GapBefore":"Gap before (s)",
+        "GapAfter":"Gap after (s)", "Gain":"Gain (s)"}
+    colR11.dataframe(
+        df_pit_windows.rename(columns=pit_windows_view),
+        hide_index=True,
+        use_container_width=True,
+        key="pit_windows_display"
+    )
 
 ## Tab LAPS
 # Load data with Laps from selected driver(s)
@@ -551,6 +585,30 @@ if len(driver_selection)>0:
 else:
     tab_Laps.write("Please, select a driver or two in the Drivers tab to display here the complete set of laps.")
 
+# Race strategy simulation (only "Race" or "Sprint", hidden while replaying)
+if (not replay_active) & ((st.session_state.sel_GP_session == "Race") | (st.session_state.sel_GP_session =="Sprint")):
+    df_strategies, df_compound_models, pit_loss = load_strategy_ranking(
+        st.session_state.sel_year, st.session_state.sel_GP, st.session_state.sel_GP_session,
+        select_session.laps, df_total_laps, n_laps, time_fuel_lap
+    )
+    tab_Laps.divider()
+    colL7, colL8 = tab_Laps.columns([0.7, 0.3])
+    strategies_view = {
+        "Mean":"Mean race time (s)", "Delta":"Delta (s)", "P10":"P10 (s)", "P90":"P90 (s)", "Best":"Fastest in scenarios (%)"}
+    colL7.dataframe(
+        df_strategies.head(20).assign(Best=lambda df: df.loc[:,"Best"]*100).round(2).rename(columns=strategies_view),
+        hide_index=True,
+        use_container_width=True,
+        key="strategies_display"
+    )
+    colL8.metric("Estimated pit loss", f"{pit_loss:.1f} s")
+    colL8.metric("Ranked compound sequences", len(df_strategies))
+    colL8.dataframe(
+        df_compound_models.loc[:,["Pace", "Degradation"]].round(3).rename(columns={"Pace":"Pace (s)", "Degradation":"Degradation (s/lap)"}),
+        use_container_width=True,
+        key="compound_models_display"
+    )
+
 # Laps list creation
 laps_list = [f"Lap {int(lap)} | {select_session.results.loc[select_session.results.loc[:,"BroadcastName"]==driver, "Abbreviation"].iloc[0]}"
             for _,driver in enumerate(driver_selection)
@@ -581,75 +639,42 @@ if len(list_laps_selection)>0:
 
 ## Tab TELEMETRY
 ## Data wrangling
-# Telemetry data resampling and interpolation, delta time calculation
-def inter_tel_data(s_distance, original_telem, driver, lap_n):
-    df_telem = pd.DataFrame({
-        "Distance": s_distance,
-        "X (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"X"]/10),
-        "Y (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Y"]/10),
-        "Z (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Z"]/10),
-        "Speed": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Speed"]),
-        "RPM": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"RPM"]),
-        "nGear": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"nGear"]),
-        "Throttle": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Throttle"]),
-        "Brake": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Brake"]),
-        "Time": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Time"].map(convert_time_float)),
-        "Driver": [driver for x in s_distance],
-        "LapN": [lap_n for x in s_distance]
-    })
-    if lap_n == 1:
-        df_telem.loc[:,"Delta"] = [0 for x in s_distance]
-    return df_telem
-
-# Low-pass filtering function
-def butter_lowpass_filter(data, cutoff, fs, order=4):
-    nyq = 0.5 * fs  # Nyquist frequency
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    y = filtfilt(b, a, data)
-    return y
-
-# # Longitudinal and lateral acceleration approximation
-# def get_acceleration(original_df):
-#     original_df.loc[:,["dxdt", "dydt"]] = pd.DataFrame(np.gradient(original_df.loc[:,["X (m)", "Y (m)"]], original_df.loc[:,"Time"], axis=0), columns=["dxdt", "dydt"])
-#     original_df.loc[:,"dxdt"] = butter_lowpass_filter(original_df.loc[:,"dxdt"], cutoff=0.05, fs=1.0) #0.05
-#     original_df.loc[:,"dydt"] = butter_lowpass_filter(original_df.loc[:,"dydt"], cutoff=0.05, fs=1.0) #0.05
-#     original_df.loc[:,["ddxdt", "ddydt"]] = pd.DataFrame(np.gradient(original_df.loc[:,["dxdt", "dydt"]], original_df.loc[:,"Time"], axis=0), columns=["ddxdt", "ddydt"])
-#     original_df.loc[:,"ddxdt"] = butter_lowpass_filter(original_df.loc[:,"ddxdt"], cutoff=0.05, fs=1.0) #0.05
-#     original_df.loc[:,"ddydt"] = butter_lowpass_filter(original_df.loc[:,"ddydt"], cutoff=0.05, fs=1.0) #0.05
-#     mod_dataframe = original_df.assign(
-#         R=lambda df: (df.loc[:,"dxdt"]**2 + df.loc[:,"dydt"]**2)**1.5 / (df.loc[:,"dxdt"]*df.loc[:,"ddydt"] - df.loc[:,"dydt"]*df.loc[:,"ddxdt"])
-#     )
-#     mod_dataframe.loc[:,"ay"] = mod_dataframe.apply(lambda s: (s.at["Speed"]/3.6)**2/(9.81*s.at["R"]), axis=1)
-#     mod_dataframe.loc[:,"ay_BB"] = butter_lowpass_filter(mod_dataframe.loc[:,"ay"], cutoff=0.3, fs=1.0) #0.3
-#     mod_dataframe.loc[:,"ax"] = pd.DataFrame(np.gradient(mod_dataframe.loc[:,"Speed"]/3.6, mod_dataframe.loc[:,"Time"], axis=0)/9.81, columns=["ax"])
-#     mod_dataframe.loc[:,"ax_BB"] = butter_lowpass_filter(mod_dataframe.loc[:,"ax"], cutoff=0.07, fs=1.0) #0.07
-#     return mod_dataframe.drop(columns=["ax", "ay"]).rename(columns={"ax_BB":"Ax (g)", "ay_BB":"Ay (g)"})
-
 # Load data with Telemetry from selected laps & data formatting
 if len(list_laps_selection)>0:
+    colT5, colT6 = tab_Telemetry.columns([0.15, 0.85])
+    adaptive_resampling = colT5.toggle("Adaptive resampling", key="adaptive_resampling")
+    adaptive_samples = colT6.slider(
+        "Samples per lap", min_value=300, max_value=1500, value=ADAPTIVE_SAMPLES, step=50,
+        key="adaptive_samples", disabled=not(adaptive_resampling)
+    )
     select_session = load_data_session(st.session_state.sel_year, st.session_state.sel_GP, st.session_state.sel_GP_session, laps=True, telemetry=True)
     select_laps_1 = select_session.laps.pick_driver(st.session_state.sel_telem_1)
     select_lap_1 = select_laps_1.pick_laps(list_laps_selection[0][1])
     df_telemetry_laps = select_lap_1.get_telemetry()
     s_distance = range(0,round(df_telemetry_laps.at[df_telemetry_laps.index[-1],"Distance"]),4)
     s_driver_1 = list_laps_selection[0][0]
-    df_telemetry_laps_inter = inter_tel_data(s_distance, df_telemetry_laps, s_driver_1, 1)
-    # df_telemetry_laps_inter = get_acceleration(df_telemetry_laps_inter)
+    list_telemetry_laps = [df_telemetry_laps]
     if len(list_laps_selection)>1:
         select_laps_2 = select_session.laps.pick_driver(st.session_state.sel_telem_2)
         select_lap_2 = select_laps_2.pick_laps(list_laps_selection[1][1])
         df_telemetry_laps_2 = select_lap_2.get_telemetry()
         s_distance_2 = range(0,round(df_telemetry_laps_2.at[df_telemetry_laps_2.index[-1],"Distance"]),4)
         s_driver_2 = list_laps_selection[1][0]
-        min_distance = s_distance
         if len(s_distance_2)<len(s_distance):
-            min_distance = s_distance_2
-        df_telemetry_laps_inter_2 = inter_tel_data(min_distance, df_telemetry_laps_2, s_driver_2, 2)
-        df_telemetry_laps_inter = df_telemetry_laps_inter.iloc[:len(min_distance),:]
-        df_telemetry_laps_inter_2.loc[:,"Delta"] = [df_telemetry_laps_inter_2.iloc[i].at["Time"] - df_telemetry_laps_inter.iloc[i].at["Time"] for i,_ in enumerate(min_distance)]
-        # df_telemetry_laps_inter_2 = get_acceleration(df_telemetry_laps_inter_2)
+            s_distance = s_distance_2
+        list_telemetry_laps.append(df_telemetry_laps_2)
+
+# Common grid for the compared laps, denser where the car data changes quickly
+    if adaptive_resampling:
+        s_distance = adaptive_distance_grid(list_telemetry_laps, n_samples=adaptive_samples)
+    df_telemetry_laps_inter = inter_tel_data(s_distance, df_telemetry_laps, s_driver_1, 1)
+    if len(list_laps_selection)>1:
+        df_telemetry_laps_inter_2 = inter_tel_data(s_distance, df_telemetry_laps_2, s_driver_2, 2)
+        df_telemetry_laps_inter_2.loc[:,"Delta"] = df_telemetry_laps_inter_2.loc[:,"Time"].to_numpy() - df_telemetry_laps_inter.loc[:,"Time"].to_numpy()
         df_telemetry_laps_inter = pd.concat([df_telemetry_laps_inter, df_telemetry_laps_inter_2])
+
+# Longitudinal and lateral acceleration (all selected laps in one batch)
+    df_telemetry_laps_inter = get_acceleration(df_telemetry_laps_inter)
 else:
     tab_Telemetry.write("Please, select a lap or two in the Laps tab to display here the telemetry.")
 colT1, colT2 = tab_Telemetry.columns([0.85, 0.15])
@@ -801,35 +826,34 @@ if len(list_laps_selection)>0:
     )
     colT4.altair_chart(alt_T3)
 
-# # Chart #4: g-g plot per driver
-#     alt_T4 = alt.Chart(df_telemetry_laps_inter, title="g-g diagram").mark_point(
-#     #filled=True,
-#     size=50
-#     ).encode(
-#     x=alt.X("Ay (g)"),
-#     y=alt.Y("Ax (g)"),
-#     color=alt.Color("LapN:N").scale(range=["blue", "cyan"]).legend(None),
-#     #tooltip=alt.value(None)
-#     ).properties(
-#         height=500,
-#         width=500
-#     )
-#     colT3.altair_chart(alt_T4)
-
-# # Chart #5: lateral acceleration vs speed plot per driver
-#     alt_T4 = alt.Chart(df_telemetry_laps_inter, title="Lateral acceleration per speed").mark_point(
-#     filled=True,
-#     size=50
-#     ).encode(
-#     x=alt.X("Speed"),
-#     y=alt.Y("Ay (g)"),
-#     color=alt.Color("LapN:N").scale(range=["blue", "cyan"]).legend(None),
-#     #tooltip=alt.value(None)
-#     ).properties(
-#         height=500,
-#         width=500
-#     )
-#     colT4.altair_chart(alt_T4)
+# Chart #4: g-g plot per driver
+    alt_T4 = alt.Chart(df_telemetry_laps_inter, title="g-g diagram").mark_point(
+    size=50
+    ).encode(
+    x=alt.X("Ay (g):Q"),
+    y=alt.Y("Ax (g):Q"),
+    color=alt.Color("LapN:N").scale(domain=[1,2], range=["blue", "cyan"]).legend(None),
+    tooltip=["Driver", alt.Tooltip(field="Speed", formatType="number", format="d")]
+    ).properties(
+        height=500,
+        width=500
+    )
+    colT3.altair_chart(alt_T4)
+
+# Chart #5: lateral acceleration vs speed plot per driver
+    alt_T5 = alt.Chart(df_telemetry_laps_inter, title="Lateral acceleration per speed").mark_point(
+    filled=True,
+    size=50
+    ).encode(
+    x=alt.X("Speed:Q").title("Speed (km/h)"),
+    y=alt.Y("Ay (g):Q"),
+    color=alt.Color("LapN:N").scale(domain=[1,2], range=["blue", "cyan"]).legend(None),
+    tooltip=["Driver", alt.Tooltip(field="Ay (g)", formatType="number", format=".2f")]
+    ).properties(
+        height=500,
+        width=500
+    )
+    colT4.altair_chart(alt_T5)
 
 # Selected laps info display
 if len(list_laps_selection)>0:
@@ -837,3 +861,50 @@ if len(list_laps_selection)>0:
     if len(list_laps_selection)>1:
         colT2.divider()
         show_metrics_lap_2()
+
+# Full-grid fastest lap comparison
+tab_Telemetry.divider()
+ghost_mode = tab_Telemetry.toggle("Full-grid fastest lap comparison", key="ghost_mode")
+if ghost_mode:
+    ghost_drivers, ghost_distance, ghost_values = load_fastest_laps(
+        st.session_state.sel_year, st.session_state.sel_GP, st.session_state.sel_GP_session
+    )
+    if len(ghost_drivers)>0:
+        colT7, colT8, colT9 = tab_Telemetry.columns(3)
+        ghost_subset = colT7.multiselect("Drivers in comparison", options=ghost_drivers, default=ghost_drivers, key="ghost_subset")
+        ghost_reference = colT8.selectbox("Reference", options=ghost_drivers, index=0, key="ghost_reference")
+        ghost_highlight = colT9.multiselect(
+            "Highlighted drivers", options=ghost_drivers, default=ghost_drivers[:2], max_selections=5, key="ghost_highlight"
+        )
+        df_ghost_band, df_ghost_selected = ghost_comparison(
+            ghost_drivers, ghost_distance, ghost_values, ghost_reference, ghost_highlight, ghost_subset
+        )
+
+# Chart #6: Speed and delta vs distance, field quartile band + highlighted drivers
+        ghost_color = alt.Color("Driver:N").scale(domain=df_color_schema.loc[:,"Abbreviation"], range=df_color_schema.loc[:,"TeamColor"])
+        for ghost_channel, ghost_title in [("Speed", "Speed (km/h)"), ("Delta", f"Delta to {ghost_reference} (s)")]:
+            alt_T6_band = alt.Chart(df_ghost_band).mark_area(opacity=0.3, color="grey").encode(
+                alt.X("Distance:Q").title("Lap distance (m)"),
+                alt.Y(f"{ghost_channel}_P25:Q").title(ghost_title),
+                alt.Y2(f"{ghost_channel}_P75:Q")
+            )
+            alt_T6_median = alt.Chart(df_ghost_band).mark_line(color="grey", strokeDash=[4, 4]).encode(
+                alt.X("Distance:Q"),
+                alt.Y(f"{ghost_channel}_median:Q")
+            )
+            alt_T6_selected = alt.Chart(df_ghost_selected).mark_line().encode(
+                alt.X("Distance:Q"),
+                alt.Y(f"{ghost_channel}:Q"),
+                color=ghost_color,
+                tooltip=["Driver", alt.Tooltip(field="Distance", formatType="number", format="d"), alt.Tooltip(field=ghost_channel, formatType="number", format=".2f")]
+            )
+            alt_T6 = alt.layer(alt_T6_band, alt_T6_median, alt_T6_selected).properties(
+                height=300,
+                width=950
+            ).interactive()
+            tab_Telemetry.altair_chart(alt_T6, use_container_width=True)
+
+# Live-timing replay refresh
+if replay_active and (replay_follow or not(st.session_state.replay.finished)):
+    time.sleep(REPLAY_REFRESH)
+    st.rerun()
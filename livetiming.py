@@ -0,0 +1,214 @@
+import ast
+import time
+import numpy as np
+import pandas as pd
+
+# Message categories used by the replay, the rest (CarData.z, Position.z, ...) is skipped unparsed
+REPLAY_CATEGORIES = ("DriverList", "TimingData", "TimingAppData", "LapCount")
+
+LAPS_POSITION_COL = ["LapNumber", "Driver", "Position", "Team"]
+TOTAL_LAPS_COL = ["Driver", "Team", "LapNumber", "Stint", "Compound", "TyreLife", "LapTime", "Time",
+                  "LapTime_Q", "FuelCorr", "LapTime_Q_corr"]
+RESULTS_COL = ["Position", "Status", "Number", "Driver", "Team", "Leader", "Points"]
+
+# Recursive merge of a live timing update into the current state
+# (new subtrees are merged into {} too, so that "Stints" lists are always normalized)
+def merge_update(state, update):
+    for key, value in update.items():
+        if isinstance(value, dict):
+            current = state.get(key)
+            if isinstance(current, list):
+                current = {str(i): item for i, item in enumerate(current)}
+            elif not isinstance(current, dict):
+                current = {}
+            state[key] = current
+            merge_update(current, value)
+        elif isinstance(value, list):
+            state[key] = {str(i): item for i, item in enumerate(value)} if key == "Stints" else value
+        else:
+            state[key] = value
+    return state
+
+# "1:32.456" -> 92.456
+def parse_lap_time(value):
+    if not value:
+        return np.nan
+    try:
+        minutes, _, seconds = value.rpartition(":")
+        return int(minutes or 0)*60 + float(seconds)
+    except ValueError:
+        return np.nan
+
+# Rows appended to a frame, empty frames left out of the concat so that the columns keep the rows dtypes
+def append_rows(df, df_rows):
+    if len(df_rows) == 0:
+        return df
+    if len(df) == 0:
+        return df_rows.reset_index(drop=True)
+    return pd.concat([df, df_rows], ignore_index=True)
+
+# Message lines as written by the FastF1 livetiming client: ['Category', {...}, 'timestamp']
+def parse_line(line):
+    line = line.strip()
+    if not line.startswith(("['", "{")):
+        return []
+    if line.startswith("['") and not line.startswith(tuple(f"['{cat}'" for cat in REPLAY_CATEGORIES)):
+        return []
+    try:
+        msg = ast.literal_eval(line)
+    except (ValueError, SyntaxError):
+        return []
+    # Initial subscription response: full state of every category, no timestamp
+    if isinstance(msg, dict):
+        return [(cat, data, None) for cat, data in msg.get("R", {}).items() if cat in REPLAY_CATEGORIES]
+    if len(msg) < 3:
+        return []
+    return [(msg[0], msg[1], pd.Timestamp(msg[2]))]
+
+# Incremental replay of a recorded live timing file
+class LiveTimingReplay:
+
+    def __init__(self, path, speed=1.0, fuel_start=110, fuel_lap_effect=0.03):
+        self.path = path
+        self.speed = speed
+        self.fuel_start = fuel_start
+        self.fuel_lap_effect = fuel_lap_effect
+        self.finished = False
+        self.total_laps = None
+        self.drivers = {}
+        self.timing = {}
+        self.timing_app = {}
+        self.df_laps_position = pd.DataFrame(columns=LAPS_POSITION_COL)
+        self.df_total_laps = pd.DataFrame(columns=TOTAL_LAPS_COL)
+        self._offset = 0
+        self._pending = []
+        self._laps_count = {}
+        self._first_time = None
+        self._replay_time = None
+        self._wall_time = None
+
+    # Change the replay speed without jumping in the session
+    def set_speed(self, speed):
+        if speed != self.speed:
+            self._replay_time = self.replay_time()
+            self._wall_time = time.monotonic()
+            self.speed = speed
+
+    # Session timestamp reached by the replay clock
+    def replay_time(self, wall_time=None):
+        if self._replay_time is None:
+            return None
+        wall_time = time.monotonic() if wall_time is None else wall_time
+        return self._replay_time + pd.Timedelta(seconds=(wall_time - self._wall_time)*self.speed)
+
+    # Apply every message up to the replay clock and append the completed laps
+    def poll(self, wall_time=None):
+        new_laps = []
+        with open(self.path, "r", encoding="utf-8-sig") as file:
+            file.seek(self._offset)
+            while True:
+                if len(self._pending) == 0:
+                    line = file.readline()
+                    # End of file, or a line still being written during a live session
+                    if not line.endswith("\n"):
+                        self.finished = True
+                        break
+                    self.finished = False
+                    self._offset = file.tell()
+                    self._pending = parse_line(line)
+                    continue
+                category, data, timestamp = self._pending[0]
+                if timestamp is not None:
+                    if self._first_time is None:
+                        self._first_time = timestamp
+                        self._replay_time = timestamp
+                        self._wall_time = time.monotonic() if wall_time is None else wall_time
+                    if timestamp > self.replay_time(wall_time):
+                        break
+                self._pending.pop(0)
+                new_laps += self._apply(category, data, timestamp)
+        if len(new_laps) > 0:
+            self._append_laps(pd.DataFrame.from_records(new_laps))
+        return len(new_laps)
+
+    def _apply(self, category, data, timestamp):
+        if category == "DriverList":
+            for number, info in data.items():
+                if isinstance(info, dict):
+                    self.drivers.setdefault(number, {}).update(info)
+        elif category == "LapCount":
+            self.total_laps = data.get("TotalLaps", self.total_laps)
+        elif category == "TimingAppData":
+            merge_update(self.timing_app, data)
+        elif category == "TimingData":
+            merge_update(self.timing, data)
+            return [self._lap_row(number, timestamp) for number, line in data.get("Lines", {}).items()
+                    if isinstance(line, dict) and self._new_lap(number)]
+        return []
+
+    def _new_lap(self, number):
+        laps = self.timing.get("Lines", {}).get(number, {}).get("NumberOfLaps")
+        if laps is None or laps <= self._laps_count.get(number, 0):
+            return False
+        self._laps_count[number] = laps
+        return True
+
+    def _lap_row(self, number, timestamp):
+        line = self.timing["Lines"][number]
+        driver = self.drivers.get(number, {})
+        stints = self.timing_app.get("Lines", {}).get(number, {}).get("Stints", {})
+        stint = stints[max(stints, key=int)] if len(stints) > 0 else {}
+        return {
+            "LapNumber": float(line["NumberOfLaps"]),
+            "Driver": driver.get("Tla", number),
+            "Position": float(line.get("Position") or np.nan),
+            "Team": driver.get("TeamName"),
+            "Stint": float(len(stints)) if len(stints) > 0 else np.nan,
+            "Compound": stint.get("Compound"),
+            "TyreLife": float(stint["TotalLaps"]) if stint.get("TotalLaps") is not None else np.nan,
+            "LapTime_Q": parse_lap_time(line.get("LastLapTime", {}).get("Value")),
+            "Time": timestamp - self._first_time if timestamp is not None else pd.NaT,
+        }
+
+    # Derived columns only for the new laps, then appended to the existing frames
+    def _append_laps(self, df_new):
+        df_new = df_new.assign(
+            LapTime=lambda df: pd.to_timedelta(df.loc[:,"LapTime_Q"], unit="s"),
+            FuelCorr=lambda df: round((self.total_laps - df.loc[:,"LapNumber"])*self.fuel_lap_time(), 3) if self.total_laps else 0.0,
+            LapTime_Q_corr=lambda df: df.loc[:,"LapTime_Q"] - df.loc[:,"FuelCorr"]
+        )
+        self.df_laps_position = append_rows(self.df_laps_position, df_new.loc[:,LAPS_POSITION_COL])
+        self.df_total_laps = append_rows(self.df_total_laps, df_new.loc[df_new.loc[:,"LapTime_Q"].notna(),TOTAL_LAPS_COL])
+
+    def fuel_lap_time(self):
+        return (self.fuel_start-1)/self.total_laps*self.fuel_lap_effect
+
+    # Driver / team color schema, same columns as the app one
+    @property
+    def color_schema(self):
+        return pd.DataFrame.from_records([
+            {
+                "Abbreviation": driver.get("Tla", number),
+                "TeamName": driver.get("TeamName"),
+                "TeamColor": "#"+driver.get("TeamColour", "808080"),
+            }
+            for number, driver in self.drivers.items()
+        ], columns=["Abbreviation", "TeamName", "TeamColor"])
+
+    # Current classification, same columns as the race results view
+    @property
+    def results(self):
+        lines = self.timing.get("Lines", {})
+        df_results = pd.DataFrame.from_records([
+            {
+                "Position": float(line.get("Position") or np.nan),
+                "Status": "Retired" if line.get("Retired") else ("Stopped" if line.get("Stopped") else "Running"),
+                "Number": number,
+                "Driver": self.drivers.get(number, {}).get("BroadcastName", number),
+                "Team": self.drivers.get(number, {}).get("TeamName"),
+                "Leader": line.get("GapToLeader") or pd.NaT,
+                "Points": np.nan,
+            }
+            for number, line in lines.items()
+        ], columns=RESULTS_COL)
+        return df_results.sort_values("Position").reset_index(drop=True)
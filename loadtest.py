@@ -0,0 +1,230 @@
+import argparse
+import functools
+import os
+import resource
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import fastf1 as ff1
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import session_data
+import strategy
+import telemetry
+import timeline
+
+# Headless load / soak test: N simulated users driving app.py through interaction sequences,
+# all in one process so that they share the app caches like sessions of a Streamlit server
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+RUN_TIMEOUT = 300  # s per rerun
+
+# Interaction sequences, each step is followed by a rerun
+SCENARIOS = {
+    "browse": ["open", "season", "gp", "session"],
+    "drivers": ["open", "season", "gp", "session", "drivers"],
+    "laps": ["open", "season", "gp", "session", "drivers", "laps"],
+    "ghost": ["open", "season", "gp", "session", "ghost"],
+}
+
+# Calls of the expensive functions behind the caches (a call is a cache miss)
+COUNTED = [
+    (session_data, "load_data_session"),
+    (timeline, "race_timeline"),
+    (strategy, "simulate_strategies"),
+    (telemetry, "fastest_laps_car_data"),
+]
+
+# st.cache_data wrappers of the app and the expensive function behind each of them
+CACHED = {
+    "load_race_timeline": "race_timeline",
+    "load_strategy_ranking": "simulate_strategies",
+    "load_fastest_laps": "fastest_laps_car_data",
+}
+
+class CallCounter:
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def increment(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def wrap(self, module, name):
+        function = getattr(module, name)
+        def counted(*args, **kwargs):
+            self.increment(name)
+            return function(*args, **kwargs)
+        setattr(module, name, counted)
+
+    # Every call of a st.cache_data function of the app (hit or miss), the script applies the decorator on each rerun
+    def wrap_cache_data(self):
+        cache_data = st.cache_data
+        def counted_cache_data(function=None, **kwargs):
+            if function is None:
+                return lambda function: counted_cache_data(function, **kwargs)
+            cached = cache_data(function, **kwargs)
+            @functools.wraps(function)
+            def counted(*args, **kwargs):
+                self.increment(function.__name__)
+                return cached(*args, **kwargs)
+            counted.clear = cached.clear
+            return counted
+        counted_cache_data.clear = cache_data.clear
+        st.cache_data = counted_cache_data
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+# Resident set size sampled in the background (peak over the scenario)
+class RSSSampler(threading.Thread):
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def current_rss():
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self.current_rss())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.current_rss())
+        return self.peak
+
+def widget_by_label(widgets, label):
+    return [widget for widget in widgets if widget.label == label][0]
+
+def apply_step(at, step, args):
+    if step == "season":
+        widget_by_label(at.selectbox, "Season").set_value(args.year)
+    elif step == "gp":
+        widget_by_label(at.selectbox, "Grand Prix").set_value(args.gp)
+    elif step == "session":
+        widget_by_label(at.selectbox, "Session").set_value(args.session)
+    elif step == "drivers":
+        widget = at.multiselect(key="driver_selection")
+        widget.set_value(list(widget.options[:args.drivers]))
+    elif step == "laps":
+        widget = at.multiselect(key="laps_selection")
+        widget.set_value(list(widget.options[:2]))
+    elif step == "ghost":
+        at.toggle(key="ghost_mode").set_value(True)
+
+# One simulated user: a fresh app session going through the scenario steps
+def simulate_user(scenario, args):
+    at = AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+    latencies, errors = [], 0
+    for step in SCENARIOS[scenario]:
+        try:
+            apply_step(at, step, args)
+            start = time.perf_counter()
+            at.run()
+            latencies.append((step, time.perf_counter() - start))
+            errors += len(at.exception)
+        except Exception:
+            errors += 1
+            break
+    return latencies, errors
+
+def run_scenario(scenario, users, args, counter):
+    if args.cold:
+        st.cache_data.clear()
+    counter.reset()
+    # The peak is the process-wide one, RSS at the scenario start tells what the scenario itself added
+    start_rss = RSSSampler.current_rss()
+    sampler = RSSSampler()
+    sampler.start()
+    start = time.perf_counter()
+    latencies, errors, sessions = [], 0, 0
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        while True:
+            for user_latencies, user_errors in executor.map(lambda _: simulate_user(scenario, args), range(users)):
+                latencies += user_latencies
+                errors += user_errors
+                sessions += 1
+            # Soak mode: keep the same number of users going until the duration is over
+            if time.perf_counter() - start >= args.duration:
+                break
+    peak_rss = sampler.stop()
+    reruns = np.array([latency for _, latency in latencies]) if len(latencies) > 0 else np.array([np.nan])
+    cached_calls = sum(counter.counts[name] for name in CACHED)
+    cache_misses = sum(counter.counts[name] for name in CACHED.values())
+    return {
+        "Scenario": scenario,
+        "Users": users,
+        "Sessions": sessions,
+        "Reruns": len(latencies),
+        "Errors": errors,
+        "p50 (s)": round(float(np.percentile(reruns, 50)), 3),
+        "p95 (s)": round(float(np.percentile(reruns, 95)), 3),
+        "Max (s)": round(float(np.max(reruns)), 3),
+        "Start RSS (MB)": round(start_rss/2**20, 1),
+        "Peak RSS (MB)": round(peak_rss/2**20, 1),
+        "RSS growth (MB)": round((peak_rss - start_rss)/2**20, 1),
+        "Session loads": counter.counts["load_data_session"],
+        "Loads / rerun": round(counter.counts["load_data_session"]/max(len(latencies), 1), 2),
+        "Cached calls": cached_calls,
+        "Cache misses": cache_misses,
+        "Hit ratio": round(1 - cache_misses/cached_calls, 3) if cached_calls > 0 else np.nan,
+        "Wall (s)": round(time.perf_counter() - start, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Pit Wall Analytics load / soak test")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--users", nargs="+", type=int, default=[1, 5, 10], help="concurrent simulated sessions")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--gp", required=True, help="event name, e.g. 'Bahrain Grand Prix'")
+    parser.add_argument("--session", default="Race")
+    parser.add_argument("--drivers", type=int, default=2)
+    parser.add_argument("--cache-dir", default=None, help="FastF1 cache with the offline data fixtures")
+    parser.add_argument("--offline", action="store_true", help="never hit the network, fixtures only")
+    parser.add_argument("--duration", type=float, default=0, help="s, soak test: repeat each scenario this long")
+    parser.add_argument("--cold", action="store_true", help="clear st.cache_data before each scenario")
+    parser.add_argument("--csv", default=None)
+    args = parser.parse_args()
+
+    if args.cache_dir is not None:
+        ff1.Cache.enable_cache(args.cache_dir)
+    if args.offline:
+        ff1.Cache.offline_mode(enabled=True)
+    counter = CallCounter()
+    for module, name in COUNTED:
+        counter.wrap(module, name)
+    counter.wrap_cache_data()
+
+    results = []
+    for scenario in args.scenarios:
+        for users in args.users:
+            results.append(run_scenario(scenario, users, args, counter))
+            print(f"{scenario} x{users}: p50 {results[-1]['p50 (s)']} s, p95 {results[-1]['p95 (s)']} s, "
+                  f"peak RSS {results[-1]['Peak RSS (MB)']} MB (+{results[-1]['RSS growth (MB)']} MB), "
+                  f"cache hit ratio {results[-1]['Hit ratio']}, errors {results[-1]['Errors']}")
+    df_results = pd.DataFrame(results)
+    print()
+    print(df_results.to_string(index=False))
+    if args.csv is not None:
+        df_results.to_csv(args.csv, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import fastf1 as ff1
+import pandas as pd
+
+ff1.ergast.interface.BASE_URL = "https://api.jolpi.ca/ergast/f1"
+
+# Request for data that a session cannot provide (unsupported session, missing lap, ...)
+class DataRequestError(Exception):
+    pass
+
+# Function definition
+def convert_time_string(timedelta_raw):
+    if pd.notna(timedelta_raw):
+        hours, rem = divmod(timedelta_raw.seconds, 3600)
+        minutes, seconds = divmod(rem, 60)
+        milliseconds = timedelta_raw.microseconds // 1000
+        return str(f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}")
+    else:
+        return pd.NaT
+
+def convert_time_float(timedelta_raw):
+    if pd.notna(timedelta_raw):
+        milliseconds = timedelta_raw.microseconds // 1000
+        return float(timedelta_raw.seconds)+milliseconds*0.001
+    else:
+        return pd.NaT
+
+def load_data_session(year, event, session, laps=False, telemetry=False, weather=False):
+    ff1_event = ff1.get_event(year=year, gp=event)
+    ff1_session = ff1_event.get_session(session)
+    ff1_session.load(laps=laps, telemetry=telemetry, weather=weather)
+    return ff1_session
+
+# Session results table (Qualifying / Race / Sprint view)
+def get_results_table(ff1_session, session_name):
+    select_session_results = ff1_session.results.copy()
+    if (session_name == "Qualifying"):
+        select_session_results = select_session_results.assign(
+            Q1_str=lambda df: df.loc[:,"Q1"].map(convert_time_string),
+            Q2_str=lambda df: df.loc[:,"Q2"].map(convert_time_string),
+            Q3_str=lambda df: df.loc[:,"Q3"].map(convert_time_string)
+        )
+        results_Q_col = ["Position", "DriverNumber", "BroadcastName", "TeamName", "Q1_str", "Q2_str", "Q3_str"]
+        results_Q_view = {"BroadcastName":"Driver", "DriverNumber":"Number", "TeamName":"Team", "Q1_str":"Q1", "Q2_str":"Q2", "Q3_str":"Q3"}
+        return select_session_results.loc[:,results_Q_col].rename(columns=results_Q_view)
+    elif ((session_name == "Race") | (session_name =="Sprint")):
+        select_session_results.loc[:,"Time_str"] = select_session_results.apply(
+            lambda s: convert_time_string(s.at["Time"]) if int(s.at["Position"])!=1 else pd.NaT,
+            axis=1
+        )
+        results_R_col = ["Position", "Status", "DriverNumber", "BroadcastName", "TeamName", "Time_str", "Points"]
+        results_R_view = {"DriverNumber":"Number", "BroadcastName":"Driver", "TeamName":"Team", "Time_str":"Leader"}
+        return select_session_results.loc[:,results_R_col].rename(columns=results_R_view)
+    else:
+        raise DataRequestError(f"no results view for session {session_name}, use Qualifying, Sprint or Race")
+
+# Fuel correction estimation
+def get_fuel_correction(n_laps):
+    time_fuel_lap = (110-1)/n_laps*0.03
+    df_fuel_correction = pd.DataFrame({
+        "LapNumber": [float(num) for num in range(1,1+n_laps)]
+        }).assign(
+            FuelCorr=lambda s: round((n_laps-s.loc[:,"LapNumber"])*time_fuel_lap,3)
+        )
+    return time_fuel_lap, df_fuel_correction
+
+# Lap time distribution vs team dataframe for charts
+def get_total_laps(ff1_laps, df_fuel_correction):
+    df_total_laps = ff1_laps.pick_wo_box().pick_quicklaps().loc[:,["Driver", "Team", "LapNumber", "Stint", "Compound", "TyreLife", "LapTime"]]
+    try:
+        df_total_laps = df_total_laps.loc[df_total_laps.loc["LapNumber"]!=1,:]
+    except:
+        pass
+    df_total_laps.loc[:,"LapTime_Q"] = df_total_laps.loc[:,"LapTime"].map(convert_time_float).drop(columns=["LapTime"])
+    df_total_laps = df_total_laps.merge(df_fuel_correction, on="LapNumber", how="left")
+    df_total_laps.loc[:,"LapTime_Q_corr"] = df_total_laps.apply(lambda s: s.at["LapTime_Q"]-s.at["FuelCorr"], axis=1).drop(columns=["FuelCorr"])
+    df_total_laps  = df_total_laps.merge(
+        df_total_laps.loc[:,["Team", "LapTime_Q"]].groupby("Team").median().reset_index(), on="Team", suffixes=["", "_median"]
+        )
+    return df_total_laps
+
+# Lap time gap to P1 vs driver dataframe for charts
+def get_best_laps(df_total_laps):
+    if len(df_total_laps) == 0:
+        return pd.DataFrame(columns=["Driver", "Team", "LapTime_Q", "Gap"])
+    df_best_laps = df_total_laps.loc[:,["Driver", "Team", "LapTime_Q"]].groupby("Driver").min().sort_values("LapTime_Q").reset_index()
+    df_best_laps = df_best_laps.assign(
+        Gap=lambda df: df.loc[:,"LapTime_Q"] - df.loc[df.index[0],"LapTime_Q"]
+        )
+    return df_best_laps
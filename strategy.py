@@ -0,0 +1,227 @@
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+DRY_COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+
+# Simulation defaults
+PIT_LOSS_DEFAULT = 22.0     # s, used when no pit stop can be measured
+SC_PROBABILITY = 0.5        # probability of at least one safety car per race
+SC_DURATION = 4             # laps
+SC_PACE_FACTOR = 1.4        # safety car lap time / green flag lap time
+SC_PIT_DISCOUNT = 0.5       # fraction of the pit loss saved when pitting under safety car
+RACE_STOPS = (1, 2, 3)
+SPRINT_STOPS = (0, 1)       # no mandatory stop nor two-compound rule in Sprints
+MIN_STINT = 5
+STINT_MARGIN = 5            # laps allowed beyond the longest stint observed per compound
+
+# Per-compound pace and degradation (fuel-corrected lap time = Pace + Degradation * TyreLife)
+def fit_compound_models(df_laps, min_laps=5):
+    df_fit = df_laps.loc[
+        df_laps.loc[:,"Compound"].isin(DRY_COMPOUNDS),
+        ["Driver", "Stint", "Compound", "TyreLife", "LapTime_Q_corr"]
+    ].dropna().astype({"TyreLife": float, "LapTime_Q_corr": float})
+    df_fit = df_fit.assign(
+        TyreLife_dm=lambda df: df.loc[:,"TyreLife"] - df.groupby(["Driver", "Stint"])["TyreLife"].transform("mean"),
+        LapTime_dm=lambda df: df.loc[:,"LapTime_Q_corr"] - df.groupby(["Driver", "Stint"])["LapTime_Q_corr"].transform("mean"),
+        xy=lambda df: df.loc[:,"TyreLife_dm"]*df.loc[:,"LapTime_dm"],
+        xx=lambda df: df.loc[:,"TyreLife_dm"]**2
+    )
+    df_models = df_fit.groupby("Compound").agg(
+        Laps=("LapTime_Q_corr", "size"), xy=("xy", "sum"), xx=("xx", "sum"), MaxStint=("TyreLife", "max")
+    )
+    df_models = df_models.loc[df_models.loc[:,"Laps"]>=min_laps,:].copy()
+    # Within-stint slope (removes driver / car pace), clipped to non-negative degradation
+    df_models.loc[:,"Degradation"] = np.clip(
+        np.divide(df_models.loc[:,"xy"].to_numpy(), df_models.loc[:,"xx"].to_numpy(), out=np.zeros(len(df_models)), where=df_models.loc[:,"xx"].to_numpy()>0),
+        0, None
+    )
+    df_fit = df_fit.merge(df_models.loc[:,["Degradation"]], left_on="Compound", right_index=True)
+    df_models.loc[:,"Pace"] = (
+        df_fit.loc[:,"LapTime_Q_corr"] - df_fit.loc[:,"Degradation"]*df_fit.loc[:,"TyreLife"]
+    ).groupby(df_fit.loc[:,"Compound"]).median()
+    return df_models.loc[:,["Pace", "Degradation", "MaxStint", "Laps"]].reindex(
+        [c for c in DRY_COMPOUNDS if c in df_models.index]
+    )
+
+# Pit loss: in-lap + out-lap time over two of the driver's median laps
+def estimate_pit_loss(laps):
+    df_laps = laps.loc[:,["Driver", "LapNumber", "LapTime", "PitInTime", "PitOutTime"]].assign(
+        LapTime_s=lambda df: df.loc[:,"LapTime"].dt.total_seconds()
+    )
+    df_laps = df_laps.assign(
+        Median=lambda df: df.loc[df.loc[:,"PitInTime"].isna() & df.loc[:,"PitOutTime"].isna(),:].groupby("Driver")["LapTime_s"].transform("median")
+    )
+    df_laps.loc[:,"Median"] = df_laps.groupby("Driver")["Median"].transform("max")
+    in_laps = df_laps.loc[df_laps.loc[:,"PitInTime"].notna(),["Driver", "LapNumber", "LapTime_s", "Median"]]
+    out_laps = df_laps.loc[
+        df_laps.loc[:,"PitOutTime"].notna() & (df_laps.loc[:,"LapNumber"]>1),["Driver", "LapNumber", "LapTime_s"]
+    ].assign(LapNumber=lambda df: df.loc[:,"LapNumber"]-1)
+    df_stops = in_laps.merge(out_laps, on=["Driver", "LapNumber"], suffixes=["_in", "_out"])
+    pit_loss = (df_stops.loc[:,"LapTime_s_in"] + df_stops.loc[:,"LapTime_s_out"] - 2*df_stops.loc[:,"Median"]).dropna()
+    # Drive-through penalties, red flags, etc. land far from the typical stop
+    pit_loss = pit_loss.loc[(pit_loss>5) & (pit_loss<60)]
+    if len(pit_loss) == 0:
+        return PIT_LOSS_DEFAULT
+    return float(pit_loss.median())
+
+# All strategies with n_stops stops: pit laps (S, n_stops) and compound sequences (S, n_stops+1)
+def generate_strategies(n_laps, compounds, n_stops, max_stint=None, step=1, min_stint=MIN_STINT, two_compounds=True):
+    combinations = list(itertools.combinations(range(min_stint, n_laps-min_stint+1, step), n_stops))
+    pit_laps = np.array(combinations, dtype=int).reshape(len(combinations), n_stops)
+    bounds = np.hstack([np.zeros((len(pit_laps), 1), dtype=int), pit_laps, np.full((len(pit_laps), 1), n_laps)])
+    stint_length = np.diff(bounds, axis=1)
+    pit_laps, stint_length = pit_laps[(stint_length>=min_stint).all(axis=1)], stint_length[(stint_length>=min_stint).all(axis=1)]
+
+    # Dry race rule: at least two different compounds (not in Sprints)
+    sequences = np.array([
+        seq for seq in itertools.product(range(len(compounds)), repeat=n_stops+1)
+        if (len(set(seq))>1) | (len(compounds)==1) | (not two_compounds)
+    ], dtype=int).reshape(-1, n_stops+1)
+    pit_laps = np.repeat(pit_laps, len(sequences), axis=0)
+    stint_length = np.repeat(stint_length, len(sequences), axis=0)
+    sequences = np.tile(sequences, (len(stint_length)//max(len(sequences), 1), 1))
+    if max_stint is not None:
+        valid = (stint_length <= np.asarray(max_stint)[sequences]).all(axis=1)
+        pit_laps, sequences = pit_laps[valid], sequences[valid]
+    return pit_laps, sequences
+
+# Green flag lap times (S, L) and pit indicator (S, L) for a batch of strategies
+def strategy_lap_times(pit_laps, sequences, pace, degradation, fuel):
+    n_laps = len(fuel)
+    lap_idx = np.arange(n_laps)
+    stint_idx = (lap_idx[None,:,None] >= pit_laps[:,None,:]).sum(axis=-1)
+    compound = np.take_along_axis(sequences, stint_idx, axis=1)
+    stint_start = np.hstack([np.zeros((len(pit_laps), 1), dtype=int), pit_laps])
+    tyre_life = lap_idx[None,:] - np.take_along_axis(stint_start, stint_idx, axis=1) + 1
+    lap_time = pace[compound] + degradation[compound]*tyre_life + fuel[None,:]
+    pit = np.zeros((len(pit_laps), n_laps))
+    np.put_along_axis(pit, pit_laps-1, 1.0, axis=1)
+    return lap_time, pit
+
+# Safety car laps (K, L) for K random race scenarios
+def safety_car_scenarios(n_laps, n_scenarios, sc_probability=SC_PROBABILITY, sc_duration=SC_DURATION, seed=None):
+    rng = np.random.default_rng(seed)
+    hazard = 1 - (1 - sc_probability)**(1/max(n_laps-1, 1))
+    starts = rng.random((n_scenarios, n_laps)) < hazard
+    starts[:,0] = False
+    sc = np.zeros((n_scenarios, n_laps), dtype=bool)
+    for d in range(sc_duration):
+        sc[:,d:] |= starts[:,:n_laps-d]
+    return sc
+
+# Race time (S, K) of every strategy under every scenario
+def race_times(lap_time, pit, sc, pit_loss, sc_lap_time, sc_pit_discount=SC_PIT_DISCOUNT):
+    sc = sc.astype(float)
+    # Under safety car every car laps at the same pace and pit stops are cheaper
+    green_time = lap_time.sum(axis=1)[:,None] - lap_time @ sc.T + sc_lap_time*sc.sum(axis=1)[None,:]
+    pit_time = pit_loss*(pit.sum(axis=1)[:,None] - sc_pit_discount*(pit @ sc.T))
+    return green_time + pit_time
+
+# Mean race time (S,) over the scenarios, without the (S, L) / (S, K) matrices: race_times is linear in the
+# safety car laps, so its mean only needs the per-lap safety car frequency, and stint sums come from cumulative sums
+def expected_race_times(pit_laps, sequences, pace, degradation, fuel, sc, pit_loss, sc_lap_time,
+                        sc_pit_discount=SC_PIT_DISCOUNT):
+    n_laps = len(fuel)
+    green = 1 - sc.mean(axis=0)
+    green_cum = np.concatenate([[0], np.cumsum(green)])
+    green_lap_cum = np.concatenate([[0], np.cumsum(green*np.arange(n_laps))])
+    bounds = np.hstack([np.zeros((len(pit_laps), 1), dtype=int), pit_laps, np.full((len(pit_laps), 1), n_laps)])
+    start, end = bounds[:,:-1], bounds[:,1:]
+    # Green laps of each stint and their tyre life (lap - start + 1)
+    green_laps = green_cum[end] - green_cum[start]
+    green_life = green_lap_cum[end] - green_lap_cum[start] - (start-1)*green_laps
+    stint_time = pace[sequences]*green_laps + degradation[sequences]*green_life
+    pit_time = pit_loss*(1 - sc_pit_discount*(1-green)[pit_laps-1])
+    return (stint_time.sum(axis=1) + pit_time.sum(axis=1) + (fuel*green).sum()
+            + sc_lap_time*sc.sum(axis=1).mean())
+
+# Fastest pit laps of every compound sequence (rows of the candidates kept)
+def best_pit_laps(sequences, expected, n_compounds):
+    sequence_id = sequences @ (n_compounds ** np.arange(sequences.shape[1]))
+    order = np.lexsort((expected, sequence_id))
+    _, first = np.unique(sequence_id[order], return_index=True)
+    return order[first]
+
+# Strategy label, e.g. "M-H (23)", "S" with no stop
+def strategy_labels(pit_laps, sequences, compounds):
+    initials = np.array([c[0] for c in compounds])
+    tyres = ["-".join(seq) for seq in initials[sequences]]
+    laps = [", ".join(map(str, p)) for p in pit_laps]
+    return [f"{t} ({l})" if l else t for t, l in zip(tyres, laps)]
+
+# Monte Carlo ranking of one-, two- and three-stop strategies: every pit lap is searched on the expected race
+# time (step=1, unless coarsened on purpose), then the best pit laps of each compound sequence are simulated
+def simulate_strategies(models, n_laps, time_fuel_lap, pit_loss, stops=RACE_STOPS, n_scenarios=1000,
+                        sc_probability=SC_PROBABILITY, seed=0, chunk_size=5000, step=1, two_compounds=True):
+    compounds = models.index.to_list()
+    pace = models.loc[:,"Pace"].to_numpy(dtype=float)
+    degradation = models.loc[:,"Degradation"].to_numpy(dtype=float)
+    max_stint = models.loc[:,"MaxStint"].to_numpy(dtype=float) + STINT_MARGIN
+    fuel = (n_laps - np.arange(1, n_laps+1))*time_fuel_lap
+    sc = safety_car_scenarios(n_laps, n_scenarios, sc_probability, seed=seed)
+    sc_lap_time = SC_PACE_FACTOR*float(np.median(pace))
+
+    labels, n_stops, mean, p10, p90 = [], [], [], [], []
+    best_time = np.full(n_scenarios, np.inf)
+    best_idx = np.zeros(n_scenarios, dtype=int)
+    for k in stops:
+        pit_laps, sequences = generate_strategies(n_laps, compounds, k, max_stint, step, two_compounds=two_compounds)
+        expected = np.concatenate([[]] + [
+            expected_race_times(pit_laps[i:i+chunk_size], sequences[i:i+chunk_size], pace, degradation, fuel, sc, pit_loss, sc_lap_time)
+            for i in range(0, len(pit_laps), chunk_size)
+        ])
+        candidates = best_pit_laps(sequences, expected, len(compounds))
+        pit_laps, sequences = pit_laps[candidates], sequences[candidates]
+        for i in range(0, len(pit_laps), chunk_size):
+            lap_time, pit = strategy_lap_times(pit_laps[i:i+chunk_size], sequences[i:i+chunk_size], pace, degradation, fuel)
+            times = race_times(lap_time, pit, sc, pit_loss, sc_lap_time)
+            mean.append(times.mean(axis=1))
+            chunk_p10, chunk_p90 = np.percentile(times, [10, 90], axis=1)
+            p10.append(chunk_p10)
+            p90.append(chunk_p90)
+            # Running fastest strategy per scenario (full (S, K) matrix is never kept)
+            chunk_best = times.min(axis=0)
+            improved = chunk_best < best_time
+            best_time[improved] = chunk_best[improved]
+            best_idx[improved] = len(labels) + i + times.argmin(axis=0)[improved]
+        labels += strategy_labels(pit_laps, sequences, compounds)
+        n_stops += [k]*len(pit_laps)
+    columns = ["Strategy", "Stops", "Mean", "Delta", "P10", "P90", "Best"]
+    if len(labels) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Share of scenarios in which each strategy is the fastest
+    best = np.bincount(best_idx, minlength=len(labels)) / n_scenarios
+    mean = np.concatenate(mean)
+    df_strategies = pd.DataFrame({
+        "Strategy": labels,
+        "Stops": n_stops,
+        "Mean": mean,
+        "Delta": mean - mean.min(),
+        "P10": np.concatenate(p10),
+        "P90": np.concatenate(p90),
+        "Best": best
+    }, columns=columns)
+    return df_strategies.sort_values("Mean").reset_index(drop=True)
+
+def _simulate_strategies_kwargs(kwargs):
+    return simulate_strategies(**kwargs)
+
+# Parameter sweep (pit loss x safety car probability), optionally on a process pool
+def simulate_sweep(models, n_laps, time_fuel_lap, pit_losses, sc_probabilities, max_workers=None, top=10, **kwargs):
+    grid = list(itertools.product(pit_losses, sc_probabilities))
+    params = [
+        dict(models=models, n_laps=n_laps, time_fuel_lap=time_fuel_lap, pit_loss=loss, sc_probability=prob, **kwargs)
+        for loss, prob in grid
+    ]
+    if max_workers == 1:
+        results = map(_simulate_strategies_kwargs, params)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_strategies_kwargs, params))
+    return pd.concat([
+        df.head(top).assign(PitLoss=loss, SCProbability=prob)
+        for (loss, prob), df in zip(grid, results)
+    ], ignore_index=True)
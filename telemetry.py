@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from scipy.signal import butter, sosfiltfilt
+from session_data import convert_time_float
+
+try:
+    from fastf1.exceptions import DataNotLoadedError
+except ImportError:
+    from fastf1.core import DataNotLoadedError
+
+G = 9.81
+
+# Low-pass cutoffs (normalized to the resampling frequency, fs=1.0)
+CUTOFF_DERIVATIVE = 0.05
+CUTOFF_AY = 0.3
+CUTOFF_AX = 0.07
+ACCELERATION_STEP = 4       # m, uniform grid the cutoffs are tuned for (non-uniform grids are resampled to it)
+
+# Adaptive resampling defaults
+ADAPTIVE_SAMPLES = 600
+ADAPTIVE_CHANNELS = ["Speed", "Throttle", "Brake", "nGear"]
+ADAPTIVE_BASE_STEP = 4      # m, fine grid used to measure the channels activity
+ADAPTIVE_MIN_STEP = 1       # m, no point in going below the raw telemetry resolution
+ADAPTIVE_UNIFORM = 0.25     # share of the samples spread uniformly over the lap
+ADAPTIVE_SMOOTH = 5         # base grid points, spreads the detail around each event
+
+# Full-grid fastest lap comparison
+GHOST_CHANNELS = ["Speed", "Throttle", "Brake", "nGear", "RPM"]
+
+# Low-pass filter design, cached per (cutoff, fs, order)
+@lru_cache(maxsize=32)
+def butter_lowpass_sos(cutoff, fs, order=4):
+    nyq = 0.5 * fs  # Nyquist frequency
+    normal_cutoff = cutoff / nyq
+    return butter(order, normal_cutoff, btype="low", analog=False, output="sos")
+
+# Zero-phase low-pass filtering along the last axis (one row per lap)
+def butter_lowpass_filter(data, cutoff, fs, order=4):
+    sos = butter_lowpass_sos(cutoff, fs, order)
+    data = np.asarray(data, dtype=float)
+    padlen = min(3 * (2 * len(sos) + 1), data.shape[-1] - 1)
+    if padlen < 1:
+        return data.copy()
+    return sosfiltfilt(sos, data, axis=-1, padlen=padlen)
+
+# Telemetry data resampling and interpolation, delta time calculation
+def inter_tel_data(s_distance, original_telem, driver, lap_n):
+    df_telem = pd.DataFrame({
+        "Distance": s_distance,
+        "X (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"X"]/10),
+        "Y (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Y"]/10),
+        "Z (m)": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Z"]/10),
+        "Speed": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Speed"]),
+        "RPM": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"RPM"]),
+        "nGear": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"nGear"]),
+        "Throttle": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Throttle"]),
+        "Brake": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Brake"]),
+        "Time": np.interp(x=s_distance, xp=original_telem.loc[:,"Distance"], fp=original_telem.loc[:,"Time"].map(convert_time_float)),
+        "Driver": [driver for x in s_distance],
+        "LapN": [lap_n for x in s_distance]
+    })
+    if lap_n == 1:
+        df_telem.loc[:,"Delta"] = [0 for x in s_distance]
+    return df_telem
+
+# Fastest lap car data of every driver (or a subset) on a common distance grid, one row per driver
+def fastest_laps_car_data(ff1_laps, drivers=None, step=4, channels=GHOST_CHANNELS):
+    laps = ff1_laps.loc[ff1_laps.loc[:,"LapTime"].notna(),:]
+    if "Deleted" in laps.columns:
+        laps = laps.loc[laps.loc[:,"Deleted"]!=True,:]
+    if drivers is not None:
+        laps = laps.loc[laps.loc[:,"Driver"].isin(drivers),:]
+    fastest_laps = laps.loc[laps.groupby("Driver")["LapTime"].idxmin(),:].sort_values("LapTime")
+    # Car data only (no position merge), much cheaper than get_telemetry for every lap
+    ghost_drivers, car_data = [], []
+    for _, lap in fastest_laps.iterlaps():
+        # Drivers without car data for their fastest lap are skipped
+        try:
+            data = lap.get_car_data()
+        except (KeyError, DataNotLoadedError):
+            continue
+        if len(data) == 0:
+            continue
+        car_data.append(data.add_distance())
+        ghost_drivers.append(lap["Driver"])
+    if len(car_data) == 0:
+        return ghost_drivers, np.array([]), {channel: np.empty((0, 0)) for channel in channels+["Time"]}
+
+    distance = np.arange(0, min(float(data.loc[:,"Distance"].iloc[-1]) for data in car_data), step, dtype=float)
+    values = {
+        channel: np.vstack([
+            np.interp(distance, data.loc[:,"Distance"], data.loc[:,channel].astype(float)) for data in car_data
+        ])
+        for channel in channels
+    }
+    values["Time"] = np.vstack([
+        np.interp(distance, data.loc[:,"Distance"], data.loc[:,"Time"].dt.total_seconds()) for data in car_data
+    ])
+    return ghost_drivers, distance, values
+
+# Ghost comparison: field median / quartile band and selected drivers, deltas against a reference driver
+def ghost_comparison(ghost_drivers, distance, values, reference, highlight, subset=None):
+    ghost_drivers = list(ghost_drivers)
+    rows = [i for i, driver in enumerate(ghost_drivers) if (subset is None) or (driver in subset) or (driver == reference)]
+    delta = values["Time"] - values["Time"][ghost_drivers.index(reference)]
+    speed_band = np.percentile(values["Speed"][rows], [25, 50, 75], axis=0)
+    delta_band = np.percentile(delta[rows], [25, 50, 75], axis=0)
+    df_band = pd.DataFrame({
+        "Distance": distance,
+        "Speed_P25": speed_band[0], "Speed_median": speed_band[1], "Speed_P75": speed_band[2],
+        "Delta_P25": delta_band[0], "Delta_median": delta_band[1], "Delta_P75": delta_band[2],
+    })
+    selected = [ghost_drivers.index(driver) for driver in highlight if driver in ghost_drivers]
+    df_selected = pd.DataFrame({
+        "Distance": np.tile(distance, len(selected)),
+        "Driver": np.repeat([ghost_drivers[i] for i in selected], len(distance)),
+        "Speed": values["Speed"][selected].ravel(),
+        "Delta": delta[selected].ravel(),
+    })
+    return df_band, df_selected
+
+# Common distance grid for the compared laps, denser where speed, throttle, brake or gear change quickly
+def adaptive_distance_grid(telems, n_samples=ADAPTIVE_SAMPLES, channels=ADAPTIVE_CHANNELS,
+                           base_step=ADAPTIVE_BASE_STEP, min_step=ADAPTIVE_MIN_STEP):
+    length = min(float(telem.loc[:,"Distance"].iloc[-1]) for telem in telems)
+    base = np.arange(0, length, base_step, dtype=float)
+    if len(base) < 3 or n_samples >= len(base):
+        return base
+
+    # Channels activity |d(channel)/ds| on the base grid, each channel normalized to unit mean
+    values = np.stack([
+        np.interp(base, telem.loc[:,"Distance"], telem.loc[:,channel].astype(float))
+        for telem in telems for channel in channels
+    ])
+    activity = np.abs(np.gradient(values, base, axis=-1))
+    activity_mean = activity.mean(axis=-1, keepdims=True)
+    activity = np.divide(activity, activity_mean, out=np.zeros_like(activity), where=activity_mean>0).max(axis=0)
+    activity = np.convolve(activity, np.ones(ADAPTIVE_SMOOTH)/ADAPTIVE_SMOOTH, mode="same")
+
+    # Sample density: uniform floor + activity, capped so that no step goes below min_step
+    density = ADAPTIVE_UNIFORM + (1-ADAPTIVE_UNIFORM)*activity/max(activity.mean(), 1e-12)
+    for _ in range(3):
+        density = np.minimum(density, density.sum()*base_step/(n_samples*min_step))
+
+    # Inverse CDF sampling of the density, endpoints kept
+    cdf = np.concatenate([[0], np.cumsum((density[1:] + density[:-1])/2)*base_step])
+    grid = np.interp(np.linspace(0, cdf[-1], n_samples), cdf, base)
+    return np.unique(np.round(grid, 1))
+
+# Longitudinal / lateral acceleration and curvature for N laps on a common distance grid
+# distance: (M,), x, y, speed: (N, M) in m, m, km/h
+def get_acceleration_batch(distance, x, y, speed, fs=1.0):
+    distance = np.asarray(distance, dtype=float)
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    v = np.atleast_2d(np.asarray(speed, dtype=float)) / 3.6
+    if distance.shape[0] < 3:
+        zeros = np.zeros_like(v)
+        return zeros, zeros.copy(), zeros.copy()
+
+    # Non-uniform grid (adaptive resampling): filter on the uniform grid, then back to the requested one,
+    # otherwise the per-sample cutoffs would change with the local sample spacing
+    steps = np.diff(distance)
+    if not np.allclose(steps, steps[0], rtol=1e-3):
+        uniform = np.arange(distance[0], distance[-1], ACCELERATION_STEP, dtype=float)
+        to_uniform = lambda values: np.vstack([np.interp(uniform, distance, row) for row in values])
+        results = get_acceleration_batch(uniform, to_uniform(x), to_uniform(y), to_uniform(v*3.6), fs)
+        return tuple(np.vstack([np.interp(distance, uniform, row) for row in result]) for result in results)
+
+    # Path derivatives w.r.t. lap distance (curvature does not depend on the parameterization)
+    dx = butter_lowpass_filter(np.gradient(x, distance, axis=-1), CUTOFF_DERIVATIVE, fs)
+    dy = butter_lowpass_filter(np.gradient(y, distance, axis=-1), CUTOFF_DERIVATIVE, fs)
+    ddx = butter_lowpass_filter(np.gradient(dx, distance, axis=-1), CUTOFF_DERIVATIVE, fs)
+    ddy = butter_lowpass_filter(np.gradient(dy, distance, axis=-1), CUTOFF_DERIVATIVE, fs)
+    norm = (dx**2 + dy**2)**1.5
+    curvature = np.divide(dx*ddy - dy*ddx, norm, out=np.zeros_like(norm), where=norm > 1e-12)
+
+    # ay = v^2 * k, ax = dv/dt = v * dv/ds
+    ay = butter_lowpass_filter(v**2 * curvature / G, CUTOFF_AY, fs)
+    ax = butter_lowpass_filter(v * np.gradient(v, distance, axis=-1) / G, CUTOFF_AX, fs)
+    return ax, ay, curvature
+
+# Acceleration columns for resampled telemetry (inter_tel_data format, one or more laps)
+def get_acceleration(df_telem, lap_col="LapN"):
+    if len(df_telem) == 0:
+        return df_telem.assign(**{"Ax (g)": [], "Ay (g)": [], "Curvature (1/m)": []})
+    laps = df_telem.loc[:,lap_col].to_numpy()
+    distance = df_telem.loc[:,"Distance"].to_numpy(dtype=float)
+    x = df_telem.loc[:,"X (m)"].to_numpy(dtype=float)
+    y = df_telem.loc[:,"Y (m)"].to_numpy(dtype=float)
+    speed = df_telem.loc[:,"Speed"].to_numpy(dtype=float)
+    positions = [np.flatnonzero(laps == lap) for lap in pd.unique(laps)]
+
+    ax = np.zeros(len(df_telem))
+    ay = np.zeros(len(df_telem))
+    curvature = np.zeros(len(df_telem))
+    same_grid = all(
+        len(pos) == len(positions[0]) and np.array_equal(distance[pos], distance[positions[0]])
+        for pos in positions
+    )
+    # Common grid: all laps in a single batch, otherwise one batch per lap
+    batches = [np.vstack(positions)] if same_grid else [pos[np.newaxis,:] for pos in positions]
+    for idx in batches:
+        ax_b, ay_b, k_b = get_acceleration_batch(distance[idx[0]], x[idx], y[idx], speed[idx])
+        ax[idx], ay[idx], curvature[idx] = ax_b, ay_b, k_b
+    return df_telem.assign(**{"Ax (g)": ax, "Ay (g)": ay, "Curvature (1/m)": curvature})
@@ -0,0 +1,55 @@
+import gzip
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+import api
+from session_data import DataRequestError
+
+def frame_ok(year, event, session, params):
+    return pd.DataFrame({"Driver": ["VER"]*200, "LapTime_Q": [92.5]*200})
+
+def frame_bad_request(year, event, session, params):
+    raise DataRequestError("no lap 99 for driver VER")
+
+def frame_bug(year, event, session, params):
+    raise KeyError("LapTime")
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(api, "FRAMES", {"ok": frame_ok, "bad_request": frame_bad_request, "bug": frame_bug})
+    monkeypatch.setattr(api, "payloads_cache", api.LoadingCache(api.PAYLOADS_CACHE_SIZE))
+    httpd = api.PooledHTTPServer(("127.0.0.1", 0), api.AnalyticsHandler, workers=2, queue_size=2)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def get(url, headers=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, dict(error.headers), error.read()
+
+def test_client_error_and_bug_status(server):
+    assert get(f"{server}/sessions/2024/Bahrain/Race/bad_request?format=json")[0] == 400
+    assert get(f"{server}/sessions/2024/Bahrain/Race/bug?format=json")[0] == 500
+    assert get(f"{server}/sessions/2024/Bahrain/Race/unknown?format=json")[0] == 404
+
+def test_etag_per_content_coding(server):
+    url = f"{server}/sessions/2024/Bahrain/Race/ok?format=json"
+    status, headers, body = get(url)
+    status_gzip, headers_gzip, body_gzip = get(url, {"Accept-Encoding": "gzip"})
+    assert status == status_gzip == 200
+    assert headers_gzip["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body_gzip) == body
+    assert headers["ETag"] != headers_gzip["ETag"]
+
+    assert get(url, {"If-None-Match": headers["ETag"]})[0] == 304
+    assert get(url, {"If-None-Match": headers_gzip["ETag"], "Accept-Encoding": "gzip"})[0] == 304
+    assert get(url, {"If-None-Match": headers_gzip["ETag"]})[0] == 200
@@ -0,0 +1,71 @@
+import pandas as pd
+from livetiming import LiveTimingReplay, merge_update
+from session_data import get_best_laps
+
+# Small recording in the FastF1 livetiming client format: ['Category', {...}, 'timestamp']
+RECORDING = [
+    "['DriverList', {'1': {'Tla': 'VER', 'BroadcastName': 'M VERSTAPPEN', 'TeamName': 'Red Bull Racing', 'TeamColour': '3671C6'}, "
+    "'44': {'Tla': 'HAM', 'BroadcastName': 'L HAMILTON', 'TeamName': 'Mercedes', 'TeamColour': '27F4D2'}}, '2023-03-05T15:00:00.000Z']",
+    "['LapCount', {'CurrentLap': 1, 'TotalLaps': 57}, '2023-03-05T15:00:00.500Z']",
+    "['TimingAppData', {'Lines': {'1': {'Stints': [{'Compound': 'SOFT', 'TotalLaps': 1}]}, "
+    "'44': {'Stints': [{'Compound': 'MEDIUM', 'TotalLaps': 1}]}}}, '2023-03-05T15:01:39.000Z']",
+    "['CarData.z', 'skipped', '2023-03-05T15:01:39.500Z']",
+    "['TimingData', {'Lines': {'1': {'NumberOfLaps': 1, 'Position': '1', 'LastLapTime': {'Value': '1:37.284'}}, "
+    "'44': {'NumberOfLaps': 1, 'Position': '2', 'LastLapTime': {'Value': '1:38.012'}}}}, '2023-03-05T15:01:40.000Z']",
+    "['TimingAppData', {'Lines': {'1': {'Stints': {'0': {'TotalLaps': 2}}}}}, '2023-03-05T15:03:15.000Z']",
+    "['TimingData', {'Lines': {'1': {'NumberOfLaps': 2, 'LastLapTime': {'Value': '1:35.100'}}}}, '2023-03-05T15:03:15.000Z']",
+]
+
+def write_recording(path, lines):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("".join(line+"\n" for line in lines))
+
+def test_merge_update_normalizes_new_stints():
+    state = merge_update({}, {"Lines": {"1": {"Stints": [{"Compound": "SOFT", "TotalLaps": 1}]}}})
+    assert state == {"Lines": {"1": {"Stints": {"0": {"Compound": "SOFT", "TotalLaps": 1}}}}}
+    merge_update(state, {"Lines": {"1": {"Stints": {"0": {"TotalLaps": 2}, "1": {"Compound": "HARD"}}}}})
+    assert state["Lines"]["1"]["Stints"] == {"0": {"Compound": "SOFT", "TotalLaps": 2}, "1": {"Compound": "HARD"}}
+
+def test_poll_before_first_lap(tmp_path):
+    path = tmp_path / "race.txt"
+    write_recording(path, RECORDING)
+    replay = LiveTimingReplay(str(path))
+    assert replay.poll(wall_time=0) == 0
+    assert len(replay.df_total_laps) == 0
+    assert len(get_best_laps(replay.df_total_laps)) == 0
+    assert list(replay.color_schema.loc[:,"TeamColor"]) == ["#3671C6", "#27F4D2"]
+
+def test_poll_replays_laps(tmp_path):
+    path = tmp_path / "race.txt"
+    write_recording(path, RECORDING)
+    replay = LiveTimingReplay(str(path))
+    assert replay.poll(wall_time=0) == 0
+    assert replay.poll(wall_time=120) == 2
+    assert not replay.finished
+    assert replay.poll(wall_time=1000) == 1
+    assert replay.finished
+
+    assert replay.total_laps == 57
+    lap = replay.df_total_laps.loc[(replay.df_total_laps.loc[:,"Driver"]=="VER") & (replay.df_total_laps.loc[:,"LapNumber"]==2),:]
+    assert lap.loc[:,"LapTime_Q"].iloc[0] == 95.1
+    assert lap.loc[:,"TyreLife"].iloc[0] == 2
+    assert lap.loc[:,"Compound"].iloc[0] == "SOFT"
+    assert lap.loc[:,"Time"].iloc[0] == pd.Timedelta(seconds=195)
+    assert list(replay.results.loc[:,"Driver"]) == ["M VERSTAPPEN", "L HAMILTON"]
+    assert list(get_best_laps(replay.df_total_laps).loc[:,"Driver"]) == ["VER", "HAM"]
+
+def test_poll_waits_for_partial_line(tmp_path):
+    path = tmp_path / "race.txt"
+    write_recording(path, RECORDING[:3])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(RECORDING[4][:40])
+    replay = LiveTimingReplay(str(path))
+    assert replay.poll(wall_time=0) == 0
+    assert replay.poll(wall_time=1000) == 0
+    assert replay.finished
+
+    # Rest of the line written by the live client
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(RECORDING[4][40:]+"\n")
+    assert replay.poll(wall_time=1000) == 2
+    assert list(replay.df_laps_position.loc[:,"Driver"]) == ["VER", "HAM"]
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from strategy import (SPRINT_STOPS, best_pit_laps, expected_race_times, generate_strategies, race_times,
+    safety_car_scenarios, simulate_strategies, strategy_labels, strategy_lap_times)
+
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+
+def compound_models():
+    return pd.DataFrame({
+        "Pace": [92.0, 92.6, 93.1],
+        "Degradation": [0.12, 0.07, 0.04],
+        "MaxStint": [22.0, 32.0, 40.0],
+    }, index=COMPOUNDS)
+
+def test_generate_strategies_rules():
+    pit_laps, sequences = generate_strategies(20, COMPOUNDS[:2], 1, min_stint=5)
+    # Pit laps 5..15, two-compound sequences S-M and M-S
+    assert pit_laps.shape == (22, 1) and sequences.shape == (22, 2)
+    assert pit_laps.min() == 5 and pit_laps.max() == 15
+    assert (sequences[:,0] != sequences[:,1]).all()
+    assert len(generate_strategies(20, COMPOUNDS[:2], 1, min_stint=5, two_compounds=False)[0]) == 44
+    assert len(generate_strategies(20, COMPOUNDS[:2], 0)[0]) == 0
+    pit_laps, sequences = generate_strategies(20, COMPOUNDS[:2], 0, two_compounds=False)
+    assert pit_laps.shape == (2, 0) and sequences.shape == (2, 1)
+    # Stints above the compound max stint are discarded
+    pit_laps, sequences = generate_strategies(20, COMPOUNDS[:2], 1, max_stint=[8, 20], min_stint=5)
+    stint_soft = np.where(sequences[:,0]==0, pit_laps[:,0], 20 - pit_laps[:,0])
+    assert (stint_soft <= 8).all()
+
+def test_strategy_lap_times_indexing():
+    pit_laps = np.array([[5], [3]])
+    sequences = np.array([[0, 1], [1, 2]])
+    pace = np.array([90.0, 91.0, 92.0])
+    degradation = np.array([1.0, 0.5, 0.0])
+    lap_time, pit = strategy_lap_times(pit_laps, sequences, pace, degradation, np.zeros(8))
+    # In-lap 5 on the first set (tyre life 5), out-lap 6 on the new one (tyre life 1)
+    np.testing.assert_allclose(lap_time[0], [91, 92, 93, 94, 95, 91.5, 92, 92.5])
+    np.testing.assert_allclose(lap_time[1], [91.5, 92, 92.5, 92, 92, 92, 92, 92])
+    np.testing.assert_array_equal(np.flatnonzero(pit[0]), [4])
+    np.testing.assert_array_equal(np.flatnonzero(pit[1]), [2])
+
+def test_expected_race_times_match_monte_carlo_mean():
+    models = compound_models()
+    pace, degradation = models.loc[:,"Pace"].to_numpy(), models.loc[:,"Degradation"].to_numpy()
+    fuel = (30 - np.arange(1, 31))*0.05
+    sc = safety_car_scenarios(30, 200, seed=1)
+    for n_stops in [0, 1, 2]:
+        pit_laps, sequences = generate_strategies(30, COMPOUNDS, n_stops, two_compounds=False)
+        lap_time, pit = strategy_lap_times(pit_laps, sequences, pace, degradation, fuel)
+        np.testing.assert_allclose(
+            expected_race_times(pit_laps, sequences, pace, degradation, fuel, sc, 20.0, 130.0),
+            race_times(lap_time, pit, sc, 20.0, 130.0).mean(axis=1)
+        )
+
+def test_best_pit_laps_per_sequence():
+    sequences = np.array([[0, 1], [0, 1], [1, 0], [1, 0], [0, 1]])
+    expected = np.array([5.0, 3.0, 4.0, 6.0, 7.0])
+    np.testing.assert_array_equal(np.sort(best_pit_laps(sequences, expected, 2)), [1, 2])
+
+def test_simulate_strategies_best_across_chunks_and_stops():
+    models = compound_models()
+    # Without safety car every scenario is the same race: the fastest mean strategy wins all of them
+    df = simulate_strategies(models, 40, 0.05, 20.0, stops=(1, 2), n_scenarios=50, sc_probability=0, chunk_size=1)
+    assert df.at[0,"Best"] == 1
+    assert df.loc[:,"Best"].sum() == 1
+    assert df.loc[:,"Strategy"].str.split(" ").str[0].is_unique
+    df_one_chunk = simulate_strategies(models, 40, 0.05, 20.0, stops=(1, 2), n_scenarios=50, sc_probability=0)
+    pd.testing.assert_frame_equal(df, df_one_chunk)
+
+    df = simulate_strategies(models, 40, 0.05, 20.0, stops=(1, 2), n_scenarios=200, chunk_size=7)
+    assert np.isclose(df.loc[:,"Best"].sum(), 1)
+    assert set(df.loc[:,"Stops"]) == {1, 2}
+
+def test_sprint_strategies():
+    df = simulate_strategies(compound_models(), 20, 0.05, 20.0, stops=SPRINT_STOPS, two_compounds=False, n_scenarios=50)
+    assert set(df.loc[:,"Stops"]) == {0, 1}
+    assert {"S", "M", "H"} <= set(df.loc[:,"Strategy"])
+    assert strategy_labels(np.array([[12]]), np.array([[0, 0]]), COMPOUNDS) == ["S-S (12)"]
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from telemetry import ADAPTIVE_CHANNELS, G, adaptive_distance_grid, get_acceleration, get_acceleration_batch
+
+RADIUS = 100.0
+SPEED = 180.0  # km/h
+
+def circle(distance, radius=RADIUS):
+    return radius*np.cos(distance/radius), radius*np.sin(distance/radius)
+
+# Resampled telemetry frame (inter_tel_data columns used by get_acceleration)
+def telemetry_frame(distance, x, y, speed, lap_n):
+    return pd.DataFrame({
+        "Distance": distance, "X (m)": x, "Y (m)": y, "Speed": speed, "LapN": [lap_n]*len(distance)
+    })
+
+def test_circle_lateral_acceleration():
+    distance = np.arange(0, 2*np.pi*RADIUS, 4, dtype=float)
+    x, y = circle(distance)
+    ax, ay, curvature = get_acceleration_batch(distance, x, y, np.full(len(distance), SPEED))
+    inner = slice(40, -40)
+    assert ax.shape == ay.shape == curvature.shape == (1, len(distance))
+    np.testing.assert_allclose(curvature[0,inner], 1/RADIUS, rtol=0.01)
+    np.testing.assert_allclose(ay[0,inner], (SPEED/3.6)**2/(G*RADIUS), rtol=0.01)
+    np.testing.assert_allclose(ax[0,inner], 0, atol=1e-6)
+
+def test_straight_longitudinal_acceleration():
+    # v^2 = v0^2 + 2*a*s on a straight line
+    distance = np.arange(0, 1000, 4, dtype=float)
+    accel = 5.0
+    speed = np.sqrt(20.0**2 + 2*accel*distance)*3.6
+    ax, ay, _ = get_acceleration_batch(distance, distance, np.zeros(len(distance)), speed)
+    np.testing.assert_allclose(ax[0,20:-20], accel/G, rtol=0.01)
+    np.testing.assert_allclose(ay, 0, atol=1e-9)
+
+def test_get_acceleration_batches_laps():
+    distance = np.arange(0, 2*np.pi*RADIUS, 4, dtype=float)
+    x, y = circle(distance)
+    df_telem = pd.concat([
+        telemetry_frame(distance, x, y, np.full(len(distance), SPEED), 1),
+        telemetry_frame(distance, x, y, np.full(len(distance), SPEED/2), 2),
+    ], ignore_index=True)
+    df_telem = get_acceleration(df_telem)
+    ay_1 = df_telem.loc[df_telem.loc[:,"LapN"]==1,"Ay (g)"].to_numpy()
+    ay_2 = df_telem.loc[df_telem.loc[:,"LapN"]==2,"Ay (g)"].to_numpy()
+    _, ay_single, _ = get_acceleration_batch(distance, x, y, np.full(len(distance), SPEED/2))
+    np.testing.assert_allclose(ay_2, ay_single[0])
+    np.testing.assert_allclose(ay_1[20:-20], 4*ay_2[20:-20], rtol=1e-6)
+    assert len(get_acceleration(df_telem.iloc[:0]).loc[:,"Curvature (1/m)"]) == 0
+
+# Raw telemetry (adaptive_distance_grid channels), braking from 300 to 100 km/h around brake_at
+def raw_telemetry(length, brake_at):
+    distance = np.arange(0, length, 2, dtype=float)
+    braking = (distance > brake_at) & (distance < brake_at + 100)
+    speed = np.where(distance < brake_at, 300.0, np.where(braking, 300 - 2*(distance - brake_at), 100.0))
+    return pd.DataFrame({
+        "Distance": distance,
+        "Speed": speed,
+        "Throttle": np.where(distance < brake_at, 100.0, np.where(braking, 0.0, 60.0)),
+        "Brake": braking.astype(float),
+        "nGear": np.where(distance < brake_at, 8.0, 3.0),
+    })
+
+def test_adaptive_grid_budget_and_density():
+    telem = raw_telemetry(4000, 2000)
+    grid = adaptive_distance_grid([telem], n_samples=300)
+    assert len(grid) <= 300
+    assert grid[0] == 0 and grid[-1] <= telem.loc[:,"Distance"].iloc[-1]
+    assert (np.diff(grid) > 0).all()
+    steps = np.diff(grid)
+    near = steps[(grid[:-1] > 1950) & (grid[:-1] < 2150)]
+    far = steps[(grid[:-1] > 200) & (grid[:-1] < 1500)]
+    assert near.mean() < far.mean()/3
+
+def test_adaptive_grid_shared_between_laps():
+    telems = [raw_telemetry(4000, 2000), raw_telemetry(3900, 1000)]
+    grid = adaptive_distance_grid(telems, n_samples=300)
+    assert grid[-1] < 3900
+    # Both braking zones are refined on the common grid
+    steps = np.diff(grid)
+    for brake_at in [1000, 2000]:
+        assert steps[(grid[:-1] > brake_at - 50) & (grid[:-1] < brake_at + 150)].mean() < 10
+    # Above the base grid size, the base grid itself is returned
+    assert len(adaptive_distance_grid(telems, n_samples=10000)) == len(np.arange(0, 3898, 4))
+    assert set(ADAPTIVE_CHANNELS) <= set(telems[0].columns)
+
+def test_circle_lateral_acceleration_non_uniform_grid():
+    # 2 m steps on the first half lap, 8 m on the second one: filtering must not depend on the spacing
+    half = np.pi*RADIUS
+    distance = np.concatenate([np.arange(0, half, 2), np.arange(half, 2*half, 8)])
+    x, y = circle(distance)
+    _, ay, curvature = get_acceleration_batch(distance, x, y, np.full(len(distance), SPEED))
+    inner = (distance > 160) & (distance < 2*half - 160)
+    np.testing.assert_allclose(curvature[0,inner], 1/RADIUS, rtol=0.01)
+    np.testing.assert_allclose(ay[0,inner], (SPEED/3.6)**2/(G*RADIUS), rtol=0.01)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from timeline import gap_matrices, race_timeline
+
+N_LAPS = 10
+
+# Laps frame (FastF1 columns used by race_timeline) from lap times in s, pit stops on the given in-laps
+def laps_frame(lap_times, pit_in_laps):
+    rows = []
+    for driver, times in lap_times.items():
+        end_times = np.cumsum(times)
+        for lap, (lap_time, end_time) in enumerate(zip(times, end_times), start=1):
+            rows.append({
+                "LapNumber": float(lap),
+                "Driver": driver,
+                "Time": pd.Timedelta(seconds=float(end_time)),
+                "LapTime": pd.Timedelta(seconds=float(lap_time)),
+                "PitInTime": pd.Timedelta(seconds=float(end_time)) if lap in pit_in_laps.get(driver, []) else pd.NaT,
+            })
+    return pd.DataFrame(rows)
+
+# VER leads, HAM pits on lap 4 and jumps ahead when VER pits on lap 6 (undercut), ALO never pits
+def race_laps():
+    ver = np.full(N_LAPS, 90.0)
+    ver[5] += 20
+    ham = np.full(N_LAPS, 90.5)
+    ham[3] += 20
+    ham[4:] = [88.0, 89.0, 89.0, 89.0, 89.0, 89.0]
+    alo = np.full(N_LAPS, 92.0)
+    return laps_frame({"VER": ver, "HAM": ham, "ALO": alo}, {"VER": [6], "HAM": [4]})
+
+def test_gap_and_interval():
+    df_timeline, _ = race_timeline(race_laps())
+    lap_3 = df_timeline.loc[df_timeline.loc[:,"LapNumber"]==3,:].set_index("Driver")
+    assert lap_3.at["VER","Gap"] == 0
+    assert lap_3.at["HAM","Gap"] == 1.5
+    assert lap_3.at["ALO","Gap"] == 6
+    assert lap_3.at["ALO","Interval"] == 4.5
+    assert df_timeline.loc[:,"PitIn"].sum() == 2
+    assert len(df_timeline) == 3*N_LAPS
+
+def test_missing_lap_end_time_filled():
+    laps = race_laps()
+    laps.loc[(laps.loc[:,"Driver"]=="ALO") & (laps.loc[:,"LapNumber"]==2),"Time"] = pd.NaT
+    df_timeline, _ = race_timeline(laps)
+    alo = df_timeline.loc[(df_timeline.loc[:,"Driver"]=="ALO") & (df_timeline.loc[:,"LapNumber"]==2),:]
+    assert alo.loc[:,"Gap"].iloc[0] == 4
+
+def test_undercut_window():
+    _, df_windows = race_timeline(race_laps())
+    assert len(df_windows) == 1
+    window = df_windows.iloc[0]
+    assert (window.at["Type"], window.at["Driver"], window.at["Rival"]) == ("Undercut", "HAM", "VER")
+    assert (window.at["LapFrom"], window.at["LapTo"]) == (4, 6)
+    assert window.at["GapBefore"] == 1.5
+    assert window.at["GapAfter"] == -2
+    assert window.at["Gain"] == 3.5
+    assert window.at["Success"]
+
+def test_no_window_beyond_max():
+    _, df_windows = race_timeline(race_laps(), max_window=1)
+    assert len(df_windows) == 0
+
+def test_cars_without_time_are_not_neighbours():
+    time = np.array([[10.0, 11.0, np.nan], [20.0, np.nan, 21.0]])
+    gap, interval, ahead, behind = gap_matrices(time)
+    np.testing.assert_array_equal(ahead, [[-1, 0, -1], [-1, -1, 0]])
+    np.testing.assert_array_equal(behind, [[1, -1, -1], [2, -1, -1]])
+    np.testing.assert_allclose(gap, [[0, 1, np.nan], [0, np.nan, 1]])
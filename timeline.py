@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Max laps between both pit stops to consider an undercut / overcut window
+MAX_PIT_WINDOW = 8
+
+# (lap x driver) matrices of session time at the end of each lap and in-laps
+def lap_time_matrix(laps):
+    lap_idx = laps.loc[:,"LapNumber"].to_numpy(dtype=float)
+    valid = ~np.isnan(lap_idx)
+    lap_idx = lap_idx[valid].astype(int) - 1
+    driver_idx, drivers = pd.factorize(laps.loc[:,"Driver"].to_numpy()[valid])
+    n_laps = int(lap_idx.max()) + 1 if len(lap_idx) > 0 else 0
+
+    time = np.full((n_laps, len(drivers)), np.nan)
+    lap_time = np.full((n_laps, len(drivers)), np.nan)
+    pit_in = np.zeros((n_laps, len(drivers)), dtype=bool)
+    time[lap_idx, driver_idx] = laps.loc[:,"Time"].dt.total_seconds().to_numpy()[valid]
+    lap_time[lap_idx, driver_idx] = laps.loc[:,"LapTime"].dt.total_seconds().to_numpy()[valid]
+    pit_in[lap_idx, driver_idx] = laps.loc[:,"PitInTime"].notna().to_numpy()[valid]
+
+    # Missing lap end time: previous lap end time + lap time
+    if n_laps > 1:
+        prev_time = np.vstack([np.full((1, len(drivers)), np.nan), time[:-1]])
+        time = np.where(np.isnan(time), prev_time + lap_time, time)
+    return np.arange(1, n_laps + 1), np.asarray(drivers), time, pit_in
+
+# Gap to leader, interval to car ahead and car ahead / behind per lap
+def gap_matrices(time):
+    order = np.argsort(time, axis=1, kind="stable")
+    time_sorted = np.take_along_axis(time, order, axis=1)
+    has_time = ~np.isnan(time)
+
+    gap = time - time_sorted[:,[0]]
+    interval_sorted = np.diff(time_sorted, axis=1, prepend=time_sorted[:,[0]])
+    interval = np.empty_like(time)
+    np.put_along_axis(interval, order, interval_sorted, axis=1)
+
+    ahead_sorted = np.hstack([np.full((time.shape[0], 1), -1), order[:,:-1]])
+    behind_sorted = np.hstack([order[:,1:], np.full((time.shape[0], 1), -1)])
+    ahead = np.empty_like(order)
+    behind = np.empty_like(order)
+    np.put_along_axis(ahead, order, ahead_sorted, axis=1)
+    np.put_along_axis(behind, order, behind_sorted, axis=1)
+
+    # Cars without a lap time are neither ahead nor behind anyone
+    rows = np.arange(time.shape[0])[:,None]
+    ahead = np.where(has_time, ahead, -1)
+    behind = np.where(has_time & (behind >= 0) & has_time[rows, np.maximum(behind, 0)], behind, -1)
+    return gap, interval, ahead, behind
+
+# Undercut / overcut windows between each pit stop and the neighbour's stop
+def pit_windows(laps_n, drivers, time, pit_in, ahead, behind, max_window=MAX_PIT_WINDOW):
+    n_rows = time.shape[0]
+    columns = ["Type", "Driver", "Rival", "LapFrom", "LapTo", "GapBefore", "GapAfter", "Gain", "Success"]
+    if n_rows < 3:
+        return pd.DataFrame(columns=columns)
+
+    # Row of the next in-lap (current row included) per driver
+    pit_rows = np.where(pit_in, np.arange(n_rows)[:,None], n_rows)
+    next_pit = np.minimum.accumulate(pit_rows[::-1], axis=0)[::-1]
+
+    row, driver = np.nonzero(pit_in[1:])
+    row = row + 1
+    rival_ahead = ahead[row - 1, driver]
+    rival_behind = behind[row - 1, driver]
+
+    # Undercut: pitting driver attacks the car ahead, overcut: car behind stays out on the pitting driver
+    first = np.concatenate([row, row])
+    rival = np.concatenate([rival_ahead, rival_behind])
+    attacker = np.concatenate([driver, rival_behind])
+    defender = np.concatenate([rival_ahead, driver])
+    is_undercut = np.concatenate([np.ones(len(row), dtype=bool), np.zeros(len(row), dtype=bool)])
+
+    valid = rival >= 0
+    second = np.full(len(first), n_rows)
+    second[valid] = next_pit[first[valid], rival[valid]]
+    valid &= (second > first) & (second - first <= max_window) & (second + 1 < n_rows)
+
+    first, second = first[valid], second[valid]
+    attacker, defender, is_undercut = attacker[valid], defender[valid], is_undercut[valid]
+    gap_before = time[first - 1, attacker] - time[first - 1, defender]
+    gap_after = time[second + 1, attacker] - time[second + 1, defender]
+    df_windows = pd.DataFrame({
+        "Type": np.where(is_undercut, "Undercut", "Overcut"),
+        "Driver": drivers[attacker],
+        "Rival": drivers[defender],
+        "LapFrom": laps_n[first],
+        "LapTo": laps_n[second],
+        "GapBefore": np.round(gap_before, 3),
+        "GapAfter": np.round(gap_after, 3),
+        "Gain": np.round(gap_before - gap_after, 3),
+        "Success": (gap_before > 0) & (gap_after < 0),
+    }, columns=columns)
+    return df_windows.dropna(subset=["GapBefore", "GapAfter"]).sort_values(["LapFrom", "Type"]).reset_index(drop=True)
+
+# Race timeline (long format, one row per lap and driver) and undercut / overcut windows
+def race_timeline(laps, max_window=MAX_PIT_WINDOW):
+    laps_n, drivers, time, pit_in = lap_time_matrix(laps)
+    gap, interval, ahead, behind = gap_matrices(time)
+    df_timeline = pd.DataFrame({
+        "LapNumber": np.repeat(laps_n, len(drivers)).astype(float),
+        "Driver": np.tile(drivers, len(laps_n)),
+        "Gap": np.round(gap.ravel(), 3),
+        "Interval": np.round(interval.ravel(), 3),
+        "PitIn": pit_in.ravel(),
+    }).dropna(subset=["Gap"]).reset_index(drop=True)
+    df_windows = pit_windows(laps_n, drivers, time, pit_in, ahead, behind, max_window)
+    return df_timeline, df_windows